@@ -16,16 +16,27 @@ Input Requirements:
 
 Processing Steps:
 1. Authenticates with ASF using Earthdata token
-2. Searches ASF API for Sentinel-1 SLC scenes within Borneo bbox
-3. Extracts scene metadata (fileID, scene_id, download_url, timestamps, orbit info)
-4. Creates GeoDataFrame with scene geometries and properties
-5. Adds partitioning columns (year, month) from acquisition dates
-6. Converts geometry to WKB format for Parquet compatibility
-7. Writes Hive-partitioned Parquet dataset for efficient querying
+2. In incremental mode, reads max startTime and known fileIDs from the existing year/month partitions
+3. Splits START_DATE–END_DATE into month × sub-bbox queries and runs those not yet recorded as done
+   in _search_manifest.json concurrently on a bounded thread pool; failed or interrupted months are
+   retried in full, and only the still-open recent month restarts from the newest catalogued scene
+4. Each sub-query streams its ASF result pages (asf.search_generator); every page becomes one Arrow
+   record batch built column by column (scene metadata, state vectors, year/month partition keys,
+   vectorised WKB geometry and footprint bounds)
+5. Drops scenes already in the catalog (or seen in another tile), sorts rows by orbitDirection/track/ymin/startTime
+   and writes them to their year/month partitions through the dataset writer with bounded
+   row groups, then marks the sub-query done; an interrupted run restarts only the missing ones,
+   and the script exits non-zero while any sub-query of the plan has failed
+6. Rebuilds the orbitDirection/track copy of the catalog for every track that gained scenes
+7. Refreshes the SQLite fileID/scene_id key index (_scene_index.sqlite) next to the catalog
 
 Output:
-- Partitioned Parquet dataset: /year=YYYY/month=MM/part-*.parquet
-- Schema: fileID, scene_id, download_url, startTime, orbit, track, orbitDirection, geometry (WKB)
+- Partitioned Parquet dataset: /year=YYYY/month=MM/part-<run>-*.parquet
+- Track layout: <OUT_DIR>_by_track/orbitDirection=X/track=N/part-0.parquet, rows sorted by startTime
+- Schema: fileID, scene_id, download_url, startTime, orbit, track, orbitDirection, geometry (WKB),
+  xmin, ymin, xmax, ymax, ASF baseline state vectors (pre/post position + velocity as float64[3],
+  their times, ascending_node_time), with GeoParquet ("geo") file metadata
+- AOI queries: s1_catalog.query_catalog(OUT_DIR, bbox=..., start=..., end=..., orbit_direction=..., track=...)
 
 Example Usage:
 EARTHDATA_TOKEN="your_token" python 1_generate_s1_catalog.py
@@ -33,11 +44,16 @@ EARTHDATA_TOKEN="your_token" python 1_generate_s1_catalog.py
 ###
 
 import os
+import sys
+import threading
 import asf_search as asf
-import geopandas as gpd
+from datetime import datetime
 from shapely.geometry import box
-import pyarrow as pa
-import pyarrow.dataset as ds
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import s1_catalog as cat
+import catalog_index
+import catalog_search as search
 
 # — Configuration ——————————————————————————————
 BBOX       = (108.0, -4.5, 119.0, 7.0)     # Borneo, WGS84
@@ -47,6 +63,11 @@ OUT_DIR    = os.path.expanduser(
     "/mnt/beba5e41-f2c1-4634-8385-a643e895ca6b/"
     "data/pyarrow_hive/InSAR_Forest_Disturbance_Dataset"
 )
+TRACK_DIR  = OUT_DIR + "_by_track"           # orbitDirection=/track= copy used by pair selection
+INCREMENTAL   = True   # only search/append acquisitions newer than what is already catalogued
+LOOKBACK_DAYS = 2      # re-search this many days before the newest scene to catch late ASF ingests
+TILE_DEG       = 6.0   # sub-bbox size for the search plan (degrees)
+SEARCH_WORKERS = 4     # concurrent ASF sub-queries
 os.makedirs(OUT_DIR, exist_ok=True)
 
 # — Authenticate ———————————————————————————————
@@ -55,61 +76,79 @@ if not token:
     raise RuntimeError("Set EARTHDATA_TOKEN in environment")
 session = asf.ASFSession().auth_with_token(token)
 
-# — Search ASF ——————————————————————————————————
-products = asf.search(
-    platform="Sentinel-1",
-    processingLevel="SLC",
-    intersectsWith=box(*BBOX).wkt,
-    start=START_DATE,
-    end=END_DATE
-)
-
-# — Build metadata features —————————————————————
-features = []
-for prod in products:
-    # GeoJSON geometry
-    gj = prod.geojson() if callable(prod.geojson) else prod.geojson
-
-    # Extract only the properties your product actually has:
-    p = prod.properties
-    props = {
-        "scene_id":       p["sceneName"],
-        "fileID":         p["fileID"],
-        "download_url":   p["url"],
-        "startTime":      p["startTime"],
-        "orbit":          p["orbit"],
-        "track":          p["pathNumber"],
-        "orbitDirection": p["flightDirection"]
-    }
-
-    features.append({
-        "type":       "Feature",
-        "geometry":   gj["geometry"],
-        "properties": props
-    })
-
-# — To GeoDataFrame —————————————————————————————
-gdf = gpd.GeoDataFrame.from_features(features)
-gdf.set_crs("EPSG:4326", inplace=True)
-
-# — Partitioning columns ———————————————————————
-gdf["year"]  = gdf["startTime"].str[:4]
-gdf["month"] = gdf["startTime"].str[5:7]
-
-# — WKB encode & write parquet ————————————————————
-gdf["geometry"] = gdf.geometry.apply(lambda g: g.wkb)
-table = pa.Table.from_pandas(gdf, preserve_index=False)
-
-ds.write_dataset(
-    table,
-    base_dir=OUT_DIR,
-    format="parquet",
-    partitioning=["year", "month"],
-    existing_data_behavior="overwrite_or_ignore",
-    basename_template="part-{i}.parquet"
-)
-
-print(f"✅ Wrote Sentinel-1 catalog to {OUT_DIR}")
+# — Existing catalog state ——————————————————————
+known_ids = set()
+latest    = None
+if INCREMENTAL:
+    partitions, known_ids = cat.load_catalog_state(OUT_DIR)
+    if partitions is not None:
+        for row in partitions.to_pylist():
+            print(f"  year={row['year']}/month={row['month']}: "
+                  f"{row['fileID_count_distinct']} scenes, latest {row['startTime_max']}")
+        latest = max(row["startTime_max"] for row in partitions.to_pylist())
+
+# — Plan month × sub-bbox searches ——————————————————
+# the plan always spans START_DATE–END_DATE and the manifest decides what still runs, so a
+# month that failed or was interrupted is retried even after later months were written
+plan     = search.plan_subqueries(BBOX, START_DATE, END_DATE, TILE_DEG)
+manifest = search.SearchManifest(os.path.join(OUT_DIR, "_search_manifest.json"))
+if INCREMENTAL and latest and not manifest.exists:
+    # catalog written before the manifest existed: trust it up to its newest scene
+    window = cat.incremental_window(partitions, START_DATE, END_DATE, LOOKBACK_DAYS)
+    manifest.adopt(plan, window[0] if window else END_DATE)
+todo = search.resume_plan(plan, manifest, latest if INCREMENTAL else None, LOOKBACK_DAYS)
+if not todo:
+    print(f"✅ Catalog in {OUT_DIR} is already up to date with {END_DATE}")
+    sys.exit(0)
+print(f"{len(todo)}/{len(plan)} sub-queries to run with {SEARCH_WORKERS} workers "
+      f"({len(known_ids)} scenes already catalogued)")
+
+# — Stream each sub-query's result pages into the catalog ————
+# every worker feeds its ASF result pages straight to the dataset writer under its own
+# basename; known_ids and stats are shared, so updating them is serialised by stats_lock
+# (stats also count scenes written by a sub-query that fails part way through)
+stats_lock = threading.Lock()
+stats      = {"pages": 0, "scenes": 0, "tracks": set()}
+run_tag    = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+
+def ingest_subquery(q):
+    pages = asf.search_generator(
+        platform="Sentinel-1",
+        processingLevel="SLC",
+        intersectsWith=box(*q.bbox).wkt,
+        start=q.start,
+        end=f"{q.end}T23:59:59Z"
+    )
+    cat.append_partitions(
+        cat.stream_batches(pages, known_ids, stats, lock=stats_lock), OUT_DIR, run_tag=f"{run_tag}-{q.key}"
+    )
+
+completed = 0
+failed    = []
+try:
+    for q, _ in search.run_subqueries(todo, ingest_subquery, SEARCH_WORKERS):
+        manifest.mark_done(q)
+        completed += 1
+        print(f"  [{completed}/{len(todo)}] {q.start} {q.bbox} done ({stats['scenes']} new scenes so far)")
+except search.SubQueryError as e:
+    failed = e.failed
+
+if not stats["scenes"]:
+    print(f"✅ No new scenes since last refresh of {OUT_DIR}")
+else:
+    print(f"✅ Appended {stats['scenes']} new scenes from {stats['pages']} result pages of {completed} "
+          f"sub-queries to Sentinel-1 catalog in {OUT_DIR}")
+
+    # — Refresh the track layout for the tracks that gained scenes ——
+    n_tracks = cat.write_track_layout(OUT_DIR, TRACK_DIR, stats["tracks"])
+    print(f"✅ Rebuilt {n_tracks} track partitions in {TRACK_DIR}")
+
+    # — Refresh the fileID/scene_id key index used by steps 2–5 ——
+    catalog_index.open_index(OUT_DIR)
+
+if failed:
+    sys.exit(f"❌ {len(failed)}/{len(todo)} sub-queries failed and are not in {manifest.path}; "
+             f"rerun to retry them")
 
 
 # #!/usr/bin/env python3
@@ -15,16 +15,28 @@ Input Requirements:
 
 Processing Steps:
 1. Loads Sentinel-1 scene catalog from Parquet dataset
-2. Groups scenes by track for consistent geometry
-3. For each track, sorts scenes by acquisition time
-4. Selects nearest-neighbor pairs with minimum temporal separation
-5. Fetches ASF metadata to compute perpendicular baselines
-6. Filters pairs based on perpendicular baseline threshold
-7. Outputs CSV with Reference/Secondary pairs and baseline metrics
+2. Groups scenes by orbit direction and track for consistent geometry (or, with track_dir, reads the
+   orbitDirection/track layout one track at a time in parallel)
+3. For each track, sorts scenes by acquisition time (already sorted in the track layout)
+4. Enumerates candidates per track in one vectorised pass (numpy.searchsorted on the
+   sorted times): the nearest secondary at least min_days later, or the k nearest, or
+   every secondary up to max_days. With min_overlap set, candidates come from a shapely
+   STRtree over the track's footprints instead, keeping only secondaries that cover at
+   least that fraction of the reference footprint
+5. Computes perpendicular baselines from the catalog's state vectors (ASF metadata only
+   for scenes catalogued before state vectors were captured: their distinct fileIDs are
+   requested in batched product_search calls and kept in the shared on-disk metadata cache)
+6. Filters pairs based on perpendicular baseline threshold (steps 4-6 run independently
+   per track, across `processes` worker processes when set; results merge in track order).
+   Each finished orbitDirection/track group is appended to a Parquet journal
+   (<output_csv>.journal), so a rerun after a crash only selects the remaining tracks
+7. Outputs a typed pair table (pair_table.PAIR_SCHEMA) with baseline metrics
 
 Output:
-- CSV file containing scene pairs with temporal and spatial baselines
-- Columns: Reference, Secondary, delta_days, temp_baseline, perp_baseline, track
+- Parquet pair table (or CSV for a .csv path) containing scene pairs with temporal and
+  spatial baselines
+- Columns: master_fileID, slave_fileID, master_id, slave_id, master_time, slave_time,
+  track, delta_days, temp_baseline, perp_baseline (, overlap)
 
 Example Usage:
 EARTHDATA_TOKEN="your_token" python 2_scene_pair_selector.py
@@ -34,104 +46,167 @@ import os
 import sys
 import numpy as np
 import pandas as pd
-import pyarrow.dataset as ds
 import asf_search as asf
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import s1_catalog as cat
+import pair_selection
+import asf_metadata
+import baselines
+import run_journal
+import pair_table
 
 class ScenePairSelector:
     def __init__(
         self,
         catalog_dir: str,
-        output_csv:  str   = "pairs_for_processing.csv",
+        output_csv:  str   = "pairs_for_processing.parquet",   # pair table; a .csv path writes CSV
         min_days:    int   = 12,
-        max_perp:    float = 200.0
+        max_perp:    float = 200.0,
+        track_dir:   str   = None,
+        workers:     int   = 4,
+        k_nearest:   int   = 1,
+        max_days:    int   = None,
+        cache_path:  str   = asf_metadata.DEFAULT_CACHE,
+        cache_ttl:   float = asf_metadata.DEFAULT_TTL,
+        chunk_size:  int   = 250,
+        min_overlap: float = None,
+        processes:   int   = None,
+        journal_dir: str   = None
     ):
         self.catalog_dir = catalog_dir
         self.output_csv  = output_csv
         self.min_days    = min_days
         self.max_perp    = max_perp
+        self.track_dir   = track_dir   # orbitDirection/track layout from step 1; read instead of catalog_dir if set
+        self.workers     = workers     # concurrent track reads from track_dir
+        self.k_nearest   = k_nearest   # secondaries per reference, nearest first; None = all within max_days
+        self.max_days    = max_days    # upper temporal baseline; None = unbounded
+        self.cache       = asf_metadata.MetadataCache(cache_path, cache_ttl)   # shared with step 3
+        self.chunk_size  = chunk_size  # fileIDs per batched product_search
+        self.min_overlap = min_overlap # footprint overlap (fraction of the reference) a pair needs; None = track only
+        self.processes   = processes   # per-track selection processes; None/1 runs in this process
+        self.journal_dir = journal_dir or output_csv + ".journal"   # per-track checkpoints
 
         token = os.getenv("EARTHDATA_TOKEN")
         if not token:
             sys.exit("ERROR: EARTHDATA_TOKEN not set")
         asf.ASFSession().auth_with_token(token)
 
+    def columns(self) -> list:
+        # footprints are only read when pairs are filtered by overlap
+        cols = ["fileID","startTime","track","pre_position"]
+        return cols + ["geometry"] if self.min_overlap is not None else cols
+
     def load_catalog(self) -> pd.DataFrame:
-        ds_cat = ds.dataset(
-            self.catalog_dir,
-            format="parquet",
-            partitioning="hive"
-        )
-        # ensure fileID is present
-        tbl = ds_cat.to_table(columns=["fileID","startTime","track"])
+        ds_cat = cat.open_catalog(self.catalog_dir)
+        # ensure fileID is present; one row per fileID even mid-compaction
+        tbl = cat.dedupe_file_ids(ds_cat.to_table(columns=self.columns() + ["orbitDirection"]))
         df  = tbl.to_pandas()
         print("Catalog columns:", df.columns.tolist())
         print("Catalog preview:\n", df.head(), "\n")
         df["startTime"] = pd.to_datetime(df["startTime"])
         return df
 
-    def fetch_product(self, fileID: str):
-        prods = asf.product_search([fileID])
-        if not prods:
-            raise RuntimeError(f"Product not found: {fileID}")
-        return prods[0]
+    def load_tracks(self):
+        """
+        Yield ((orbitDirection, track), group) with each group's rows in startTime order.
+
+        With a track layout, tracks are read concurrently and arrive pre-sorted, so there is
+        no global groupby or per-group sort; otherwise the whole catalog is loaded and regrouped.
+        """
+        if self.track_dir:
+            tracks = cat.iter_tracks(
+                self.track_dir, columns=self.columns(), workers=self.workers
+            )
+            for key, tbl in tracks:
+                grp = tbl.to_pandas()
+                grp["startTime"] = pd.to_datetime(grp["startTime"])
+                yield key, grp
+            return
 
-    def run(self):
         df = self.load_catalog()
-        rows = []
-
-        # group by track
-        for track, grp in df.groupby("track"):
-            grp = grp.sort_values("startTime").reset_index(drop=True)
-            for i in range(len(grp)-1):
-                m = grp.loc[i]
-                for j in range(i+1, len(grp)):
-                    s  = grp.loc[j]
-                    dt = (s.startTime - m.startTime).days
-                    if dt < self.min_days:
-                        continue
-
-                    # fetch metadata-only products
-                    try:
-                        m_prod = self.fetch_product(m.fileID)
-                        s_prod = self.fetch_product(s.fileID)
-                    except Exception as e:
-                        print(f"  ❌ Skipping {m.fileID}→{s.fileID}: {e}")
-                        break
-
-                    # compute baselines
-                    mt = dt  # same as delta_days
-                    # perp: distance between prePosition vectors
-                    m_xyz = np.array(
-                        m_prod.baseline["stateVectors"]["positions"]["prePosition"],
-                        dtype=float
-                    )
-                    s_xyz = np.array(
-                        s_prod.baseline["stateVectors"]["positions"]["prePosition"],
-                        dtype=float
-                    )
-                    perp = float(np.linalg.norm(s_xyz - m_xyz))
-
-                    if perp > self.max_perp:
-                        # once perp too large, no later scene on this track will be better
-                        break
-
-                    rows.append({
-                        "Reference":      m.fileID,
-                        "Secondary":      s.fileID,
-                        "delta_days":     dt,
-                        "temp_baseline":  mt,
-                        "perp_baseline":  perp,
-                        "track":          track
-                    })
-                    # only nearest‐in‐time per master
-                    break
-
-        out_df = pd.DataFrame(rows)
-        cols   = [
+        for key, grp in df.groupby(["orbitDirection", "track"]):
+            yield key, grp.drop(columns="orbitDirection").sort_values("startTime").reset_index(drop=True)
+
+    def fetch_products(self, fileIDs) -> dict:
+        return asf_metadata.fetch_products(fileIDs, self.cache, self.chunk_size)
+
+    def resolve_pending(self, pending: pd.DataFrame, products: dict) -> pd.DataFrame:
+        """
+        Complete candidates whose scenes were catalogued without state vectors from the
+        batch-fetched ASF products; rows still unresolved are reported and dropped.
+        """
+        def position(fid, vec):
+            if vec is not None:
+                return vec
+            try:
+                return products[fid].baseline["stateVectors"]["positions"]["prePosition"]
+            except Exception as e:
+                print(f"  ❌ Skipping pairs with {fid}: no state vectors ({e!r})")
+                return None
+
+        ref_pos = baselines.stack_positions([position(f, v) for f, v in zip(pending["Reference"], pending["ref_pos"])])
+        sec_pos = baselines.stack_positions([position(f, v) for f, v in zip(pending["Secondary"], pending["sec_pos"])])
+        pending = pending.drop(columns=["ref_pos", "sec_pos"])
+        pending["perp_baseline"] = np.linalg.norm(sec_pos - ref_pos, axis=1)
+        return pending[pending["perp_baseline"] <= self.max_perp]
+
+    def missing_vectors(self, pending: pd.DataFrame) -> list:
+        missing  = {f for f, v in zip(pending["Reference"], pending["ref_pos"]) if v is None}
+        missing |= {f for f, v in zip(pending["Secondary"], pending["sec_pos"]) if v is None}
+        return sorted(missing)
+
+    def run(self):
+        cols = [
             "Reference","Secondary",
             "delta_days","temp_baseline","perp_baseline","track"
-        ]
-        out_df.to_csv(self.output_csv, index=False, columns=cols)
+        ] + (["overlap"] if self.min_overlap is not None else [])
+
+        # resume: tracks already in the journal are skipped; changed selection parameters start afresh.
+        # A track number exists in both orbit directions, so tracks are journaled as "<orbitDirection>/<track>"
+        journal = run_journal.RunJournal(self.journal_dir, params={
+            "catalog_dir": self.catalog_dir, "track_dir": self.track_dir, "min_days": self.min_days,
+            "k_nearest": self.k_nearest, "max_days": self.max_days, "max_perp": self.max_perp,
+            "min_overlap": self.min_overlap, "journal_key": "orbitDirection/track",
+        })
+        done = journal.done_keys()
+        if done:
+            print(f"Resuming: {len(done)} tracks already journaled")
+
+        # one startTime-ordered group per orbit direction and track, selected independently (in a
+        # process pool when processes > 1); each finished track is journaled before the next is taken
+        tasks = (
+            {
+                "key": f"{direction}/{int(track)}", "track": track, "grp": grp, "min_days": self.min_days,
+                "k": self.k_nearest, "max_days": self.max_days, "min_overlap": self.min_overlap,
+                "max_perp": self.max_perp,
+            }
+            for (direction, track), grp in self.load_tracks() if f"{direction}/{int(track)}" not in done
+        )
+        pool = ProcessPoolExecutor(max_workers=self.processes) if self.processes and self.processes > 1 else None
+        try:
+            for key, pairs, pending in (pool.map if pool else map)(pair_selection.select_track_pairs, tasks):
+                if len(pending):
+                    # scenes catalogued without state vectors: one batched ASF fetch per track
+                    resolved = self.resolve_pending(pending, self.fetch_products(self.missing_vectors(pending)))
+                    pairs = pd.concat([p for p in (pairs, resolved) if len(p)] or [pairs], ignore_index=True)
+                journal.append(pairs, done=[key])
+        finally:
+            if pool:
+                pool.shutdown()
+
+        # consolidate: journaled tracks merged in track / time order, deterministic for any processes
+        out_df = journal.read()
+        if len(out_df):
+            out_df = out_df.sort_values(["track", "ref_idx", "sec_idx", "Reference"], kind="stable")
+            out_df["baseline_method"] = pair_table.STATE_VECTOR_DISTANCE
+        else:
+            out_df = pd.DataFrame(columns=cols)
+
+        pair_table.write_pairs(out_df, self.output_csv)
+        journal.remove()
         print(f"\n✅ Wrote {len(out_df)} pairs to {self.output_csv}")
 
 if __name__ == "__main__":
@@ -142,9 +217,12 @@ if __name__ == "__main__":
             #             "/mnt/beba5e41-f2c1-4634-8385-a643e895ca6b/"
             #             "data/pyarrow_hive/InSAR_Forest_Disturbance_Dataset"
         ),
-        output_csv="pairs_for_processing.csv",
+        output_csv="pairs_for_processing.parquet",
         min_days=12,
-        max_perp=200.0
+        max_perp=200.0,
+        track_dir=None,  # e.g. the "<catalog>_by_track" layout written by step 1
+        min_overlap=0.5,
+        processes=os.cpu_count()
     ).run()
 
 
@@ -8,21 +8,39 @@ Computes temporal and perpendicular baselines for Sentinel-1 scene pairs using A
 @File    : 3_compute_pair_baselines.py
 
 Input Requirements:
-- CSV file containing master/slave fileID pairs from step 2
+- Pair table from step 2 (Parquet, or a legacy CSV with master/slave or Reference/Secondary fileIDs)
 - Earthdata token (set as EARTHDATA_TOKEN environment variable)
 - Maximum perpendicular baseline threshold (default: 200m)
+- (Optional) Parquet catalog from step 1 with state-vector columns
 
 Processing Steps:
-1. Reads CSV file with master/slave scene pairs
-2. For each pair, fetches ASF product metadata
-3. Computes temporal baseline (time difference in days)
-4. Computes perpendicular baseline (Euclidean distance between ECEF positions)
-5. Filters out pairs exceeding maximum perpendicular baseline
-6. Outputs enriched CSV with baseline measurements
+1. Reads the pair table with master/slave scene pairs
+2. Collects the distinct fileIDs and reads their startTime/state vectors from the catalog;
+   the rest come from batched ASF product_search requests (chunk_size fileIDs each, up to
+   fetch_workers in flight, each with a timeout and exponential-backoff retries), memoised
+   in the shared on-disk metadata cache so reruns make no repeat requests
+3. Stacks the scene times/positions and computes every pair's temporal baseline (days)
+   and perpendicular baseline (Euclidean distance between ECEF positions) in one pass
+4. Filters out pairs exceeding maximum perpendicular baseline
+5. Outputs the enriched pair table with typed baseline columns
+
+Checkpointing:
+- Pairs are computed checkpoint_rows at a time and each finished chunk is appended to a
+  Parquet journal (<output_csv>.journal); a rerun after a crash skips journaled pairs
+- The final pair table is consolidated from the journal, which is then removed
+
+Offline mode (raw_dir set):
+- Reads orbit state vectors, scene timing and the scene-centre point from the annotation XML
+  of the downloaded SLC zips (parsed in a process pool, no network or token needed)
+- Interpolates orbits with per-scene polynomials evaluated for all pairs at once and computes
+  the geometric perpendicular baseline at zero-Doppler for the reference scene centre
+- Orbits of all remaining scenes are parsed once per run, before the checkpoint chunks
 
 Output:
-- CSV file with added baseline columns: temp_baseline, perp_baseline
-- Only pairs with perpendicular baseline ≤ threshold are retained
+- Pair table with added baseline columns: temp_baseline, perp_baseline, baseline_method
+  ("state_vector_distance" online, "zero_doppler" offline, with perp_baseline_signed)
+- Only pairs with perpendicular baseline ≤ the threshold for their method are retained
+  (max_perp for state-vector distances, max_perp_orbit for zero-Doppler Bperp)
 
 Example Usage:
 EARTHDATA_TOKEN="your_token" python 3_compute_pair_baselines.py
@@ -30,10 +48,19 @@ EARTHDATA_TOKEN="your_token" python 3_compute_pair_baselines.py
 
 import os
 import sys
+from functools import partial
 import numpy as np
 import pandas as pd
 import asf_search as asf
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import catalog_index
+import asf_metadata
+import baselines
+import safe_orbits
+import run_journal
+import pair_table
+
 class BaselineCalculator:
     """
     Reads a CSV of master/slave fileID pairs,
@@ -44,74 +71,196 @@ class BaselineCalculator:
     """
     def __init__(
         self,
-        pairs_csv:  str   = "pairs_jan2021.csv",
-        output_csv: str   = "pairs_with_baselines_filtered.csv",
-        max_perp:   float = 200.0    # metres
+        pairs_csv:  str   = "pairs_jan2021.parquet",                 # pair table from step 2 (or legacy CSV)
+        output_csv: str   = "pairs_with_baselines_filtered.parquet",  # pair table; a .csv path writes CSV
+        max_perp:   float = 200.0,   # metres, for prePosition distances (ASF / catalog state vectors)
+        max_perp_orbit: float = None,  # metres, for zero-Doppler Bperp in offline mode; None uses max_perp
+        catalog_dir: str  = None,    # step-1 catalog holding state vectors; ASF is queried without it
+        cache_path: str   = asf_metadata.DEFAULT_CACHE,
+        cache_ttl:  float = asf_metadata.DEFAULT_TTL,
+        chunk_size: int   = 250,
+        raw_dir:    str   = None,    # downloaded SLC zips; if set, baselines come from their annotations offline
+        workers:    int   = 4,       # processes parsing zip annotations in offline mode
+        metadata_url: str = None,    # stand-in metadata service (bin/metadata_stub_server.py) instead of ASF
+        fetch_workers: int = 4,      # metadata batches in flight at once
+        timeout:    float = 60.0,    # seconds per metadata request
+        retries:    int   = 4,       # retries per batch, with exponential backoff
+        checkpoint_rows: int = 500,  # pairs computed between journal checkpoints
+        journal_dir: str  = None     # checkpoint journal; defaults to <output_csv>.journal
     ):
-        self.pairs_csv  = pairs_csv
-        self.output_csv = output_csv
-        self.max_perp   = max_perp
+        self.pairs_csv   = pairs_csv
+        self.output_csv  = output_csv
+        self.max_perp    = max_perp
+        self.max_perp_orbit = max_perp if max_perp_orbit is None else max_perp_orbit
+        self.catalog_dir = catalog_dir
+        self.index       = None        # catalog key index, opened on first use
+        self.cache       = asf_metadata.MetadataCache(cache_path, cache_ttl)   # shared with step 2
+        self.chunk_size  = chunk_size  # fileIDs per batched product_search
+        self.raw_dir     = raw_dir
+        self.workers     = workers
+        self.search_fn   = asf_metadata.http_search(metadata_url) if metadata_url else None
+        self.fetch_workers = fetch_workers
+        self.timeout     = timeout
+        self.retries     = retries
+        self.checkpoint_rows = checkpoint_rows
+        self.journal_dir = journal_dir or output_csv + ".journal"
 
+        if raw_dir or metadata_url:
+            return   # no ASF access needed
         token = os.getenv("EARTHDATA_TOKEN")
         if not token:
             sys.exit("ERROR: EARTHDATA_TOKEN not set")
         asf.ASFSession().auth_with_token(token)
 
     def load_pairs(self) -> pd.DataFrame:
-        df = pd.read_csv(self.pairs_csv, dtype=str)
-        req = {"master_fileID","slave_fileID"}
-        if not req.issubset(df.columns):
-            sys.exit(f"ERROR: {self.pairs_csv} must contain columns {req}")
+        df = pair_table.read_pairs(self.pairs_csv)
+        if df[["master_fileID","slave_fileID"]].isna().any().any():
+            sys.exit(f"ERROR: {self.pairs_csv} must contain master_fileID/slave_fileID (or Reference/Secondary) for every pair")
         return df
 
-    def fetch_product(self, fileID: str):
-        prods = asf.product_search([fileID])
-        if not prods:
-            raise RuntimeError(f"Product not found: {fileID}")
-        return prods[0]
-
-    def compute_baselines(self, df: pd.DataFrame) -> pd.DataFrame:
-        df["perp_baseline"] = None
-        df["temp_baseline"] = None
+    def fetch_products(self, fileIDs) -> dict:
+        return asf_metadata.fetch_products(
+            fileIDs, self.cache, self.chunk_size, search_fn=self.search_fn,
+            workers=self.fetch_workers, timeout=self.timeout, retries=self.retries
+        )
 
-        for idx, row in df.iterrows():
-            m_fid = row["master_fileID"]
-            s_fid = row["slave_fileID"]
+    def scene_vectors(self, fileIDs) -> dict:
+        """
+        fileID -> {"startTime", "prePosition"} for every scene that can be resolved: catalog
+        vectors first, then one batched ASF request per chunk_size of the remaining fileIDs.
+        """
+        ids = set(fileIDs)
+        vectors = {}
+        if self.catalog_dir:
+            if self.index is None:
+                self.index = catalog_index.open_index(self.catalog_dir)
+            vectors = self.index.scene_vectors(ids)
+            print(f"Catalog holds state vectors for {len(vectors)}/{len(ids)} scenes")
 
+        missing = ids - set(vectors)
+        for fid, prod in (self.fetch_products(sorted(missing)) if missing else {}).items():
             try:
-                m_prod = self.fetch_product(m_fid)
-                s_prod = self.fetch_product(s_fid)
-            except Exception as e:
-                print(f"[{idx}] ERROR fetching products: {e}")
+                pos = np.array(prod.baseline["stateVectors"]["positions"]["prePosition"], dtype=float)
+            except (KeyError, TypeError):
                 continue
+            vectors[fid] = {"startTime": prod.properties["startTime"], "prePosition": pos}
+        return vectors
 
-            # temporal baseline
-            mt = pd.to_datetime(m_prod.properties["startTime"])
-            st = pd.to_datetime(s_prod.properties["startTime"])
-            dt = (st - mt).days
+    def compute_baselines(self, df: pd.DataFrame) -> pd.DataFrame:
+        # every distinct scene's state vectors up front: catalog key index, then batched ASF requests
+        vectors = self.scene_vectors(set(df["master_fileID"]) | set(df["slave_fileID"]))
 
-            # perpendicular baseline: distance between prePosition vectors
-            m_pos = np.array(m_prod.baseline["stateVectors"]["positions"]["prePosition"], dtype=float)
-            s_pos = np.array(s_prod.baseline["stateVectors"]["positions"]["prePosition"], dtype=float)
-            perp = float(np.linalg.norm(s_pos - m_pos))
+        # stack per-scene arrays once, then compute every pair by index
+        scenes = pd.Index(sorted(vectors))
+        times  = baselines.to_ns([vectors[f]["startTime"] for f in scenes]) if len(scenes) else np.empty(0, np.int64)
+        pos    = baselines.stack_positions([vectors[f]["prePosition"] for f in scenes])
+        ref    = scenes.get_indexer(df["master_fileID"])
+        sec    = scenes.get_indexer(df["slave_fileID"])
 
-            df.at[idx, "temp_baseline"] = dt
-            df.at[idx, "perp_baseline"] = perp
-            print(f"[{idx}] {m_fid}→{s_fid}: temp={dt} d, perp={perp:.1f} m")
+        ok = (ref >= 0) & (sec >= 0)
+        for idx in df.index[~ok]:
+            print(f"[{idx}] ERROR: no state vectors for {df.at[idx, 'master_fileID']} / {df.at[idx, 'slave_fileID']}")
 
+        temp, perp = baselines.pair_baselines(times, pos, ref[ok], sec[ok])
+        df["temp_baseline"] = pd.Series(pd.NA, index=df.index, dtype="Int64")
+        df["perp_baseline"] = np.nan
+        df.loc[ok, "temp_baseline"] = temp
+        df.loc[ok, "perp_baseline"] = perp
+        df["baseline_method"] = pair_table.STATE_VECTOR_DISTANCE
+        print(f"Computed baselines for {int(ok.sum())}/{len(df)} pairs")
+        return df
+
+    def zip_paths(self, df: pd.DataFrame) -> dict:
+        """
+        fileID -> SLC zip under raw_dir, named by scene_id (master_id/slave_id, else fileID less "-SLC").
+        """
+        paths = {}
+        for role in ("master", "slave"):
+            fids = df[f"{role}_fileID"]
+            sids = df[f"{role}_id"] if f"{role}_id" in df.columns else fids.str.replace(r"-SLC$", "", regex=True)
+            for fid, sid in zip(fids, sids):
+                paths[fid] = os.path.join(self.raw_dir, f"{sid}.zip")
+        return paths
+
+    def load_orbits(self, df: pd.DataFrame) -> dict:
+        orbits = safe_orbits.load_scene_orbits(self.zip_paths(df), workers=self.workers)
+        print(f"Read orbits for {len(orbits)} scenes from {self.raw_dir}")
+        return orbits
+
+    def compute_offline_baselines(self, df: pd.DataFrame, orbits: dict = None) -> pd.DataFrame:
+        """
+        Baselines from the orbit state vectors in the SLC zips' annotation XML, no network access.
+
+        perp_baseline is the geometric perpendicular baseline at the reference scene centre
+        (magnitude; perp_baseline_signed keeps the sign). `orbits` from load_orbits may cover
+        more scenes than df; they are read from the zips if not given.
+        """
+        if orbits is None:
+            orbits = self.load_orbits(df)
+
+        temp, bperp = safe_orbits.pair_baselines(orbits, df["master_fileID"], df["slave_fileID"])
+        ok = ~np.isnan(bperp)
+        df["temp_baseline"] = pd.array(np.where(ok, temp, 0), dtype="Int64")
+        df.loc[~ok, "temp_baseline"] = pd.NA
+        df["perp_baseline"]        = np.abs(bperp)
+        df["perp_baseline_signed"] = bperp
+        df["baseline_method"]      = pair_table.ZERO_DOPPLER
+        print(f"Computed baselines for {int(ok.sum())}/{len(df)} pairs")
         return df
 
     def run(self):
         df = self.load_pairs()
-        df = self.compute_baselines(df)
-        # filter by perpendicular baseline
-        df = df[df["perp_baseline"].astype(float) <= self.max_perp].reset_index(drop=True)
-        df.to_csv(self.output_csv, index=False)
-        print(f"✅ Wrote {len(df)} pairs with perp_baseline ≤ {self.max_perp} m to {self.output_csv}")
+        df["_row"] = np.arange(len(df))   # input order, restored at consolidation
+
+        # resume: pairs already in the journal are skipped; a changed input CSV or mode starts afresh
+        journal = run_journal.RunJournal(self.journal_dir, params={
+            "pairs_csv": os.path.abspath(self.pairs_csv),
+            "pairs_csv_stat": [os.path.getsize(self.pairs_csv), os.path.getmtime(self.pairs_csv)],
+            "raw_dir": self.raw_dir, "catalog_dir": self.catalog_dir,
+            "baseline_method": pair_table.ZERO_DOPPLER if self.raw_dir else pair_table.STATE_VECTOR_DISTANCE,
+        })
+        done = journal.read(columns=["_row"])["_row"]
+        todo = df[~df["_row"].isin(done)]
+        if len(done):
+            print(f"Resuming: {len(done)} pairs already journaled, {len(todo)} to go")
+
+        if self.raw_dir:
+            # every remaining scene's orbit parsed once, not again for each checkpoint chunk
+            orbits  = self.load_orbits(todo) if len(todo) else {}
+            compute = partial(self.compute_offline_baselines, orbits=orbits)
+        else:
+            compute = self.compute_baselines
+        for start in range(0, len(todo), self.checkpoint_rows):
+            chunk = compute(todo.iloc[start:start + self.checkpoint_rows].copy())
+            # unresolved pairs are not journaled, so the next run retries them
+            journal.append(chunk[chunk["perp_baseline"].notna()])
+            print(f"Checkpoint: {min(start + self.checkpoint_rows, len(todo))}/{len(todo)} pairs")
+
+        # consolidate: journaled pairs in input order, filtered by the threshold for their baseline method
+        out_df = journal.read()
+        if len(out_df):
+            out_df = out_df.sort_values("_row").drop(columns="_row")
+            limit = out_df["baseline_method"].astype(str).map({
+                pair_table.STATE_VECTOR_DISTANCE: self.max_perp, pair_table.ZERO_DOPPLER: self.max_perp_orbit,
+            })
+            df = out_df[out_df["perp_baseline"].abs() <= limit].reset_index(drop=True)
+        else:
+            # nothing resolved (empty input, ASF unreachable, no zips): an empty typed pair table
+            df = df.iloc[:0].drop(columns="_row")
+        pair_table.write_pairs(df, self.output_csv)
+        journal.remove()
+        limit = self.max_perp_orbit if self.raw_dir else self.max_perp
+        print(f"✅ Wrote {len(df)} pairs with perp_baseline ≤ {limit} m to {self.output_csv}")
 
 if __name__ == "__main__":
     BaselineCalculator(
-        pairs_csv  = "pairs_june21_mar25.csv",
-        output_csv = "pairs_june21_mar25_baseline.csv",
-        max_perp   = 200.0
+        pairs_csv  = "pairs_june21_mar25.parquet",
+        output_csv = "pairs_june21_mar25_baseline.parquet",
+        max_perp   = 200.0,
+        max_perp_orbit = None,   # zero-Doppler Bperp threshold when raw_dir is set; None reuses max_perp
+        catalog_dir = (
+            "/mnt/Disk_2/"
+            "data/pyarrow_hive/InSAR_Forest_Disturbance_Dataset"
+        ),
+        raw_dir     = None   # e.g. the step-4 RAW_DIR to compute baselines offline from the SLC zips
     ).run()
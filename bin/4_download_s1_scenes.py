@@ -8,22 +8,39 @@ Downloads Sentinel-1 SLC scenes in parallel based on validated scene pairs with
 @File    : 4_download_s1_scenes.py
 
 Input Requirements:
-- CSV file with baseline-filtered scene pairs from step 3
+- Pair table with baseline-filtered scene pairs from step 3
 - Partitioned Parquet catalog containing download URLs
 - Earthdata token (set as EARTHDATA_TOKEN environment variable)
 - Output directory for SAFE archives
 
 Processing Steps:
-1. Reads baseline-filtered pairs CSV file
-2. Loads Parquet catalog to map fileID to download URLs
-3. Collects unique URLs for all Reference and Secondary scenes
+1. Reads the baseline-filtered pair table
+2. Looks up download URL, file name, size and md5sum for the paired fileIDs in the catalog key index
+3. Plans the downloads: each distinct scene once, skipping archives already in the output
+   directory whose size (and optionally md5) matches the catalog; corrupt archives are
+   removed and re-queued, and the bytes saved are reported
 4. Authenticates with ASF using Earthdata token
-5. Downloads SAFE archives in parallel (configurable processes)
-6. Validates successful download of all required scenes
+5. Downloads SAFE archives on threads sharing one pooled, authenticated session; the number
+   of transfers in flight adapts to throughput (AIMD) between MIN_PARALLEL and MAX_PARALLEL,
+   streaming each to a .part file that is resumed with
+   HTTP Range requests after a dropped connection
+6. Verifies each archive's size and md5sum against the catalog before renaming it into place
+7. Orders the transfers so whole pairs complete as early as possible and appends a "pair
+   ready" event to OUT_DIR/pairs_ready.jsonl as each pair's two archives are on disk, so SNAP
+   processing (sentinel1slc.main(ready_queue=...)) can start while downloads continue
+8. With SLC_BUDGET_GB set, keeps this table's zips within the budget (slc_store.SLCStore):
+   pairs already processed are skipped, and each transfer waits until the SNAP stage has
+   released enough processed scenes for it to fit
+
+9. Logs per-file metrics (bytes, MB/s, time to first byte, retries, serving host) and
+   aggregate progress (MB/s, active transfers, concurrency cap, ETA, stalls) to
+   METRICS_FILE, with a live progress line every PROGRESS_INTERVAL seconds
 
 Output:
 - Downloaded SAFE (.zip) archives in specified output directory
-- Progress reporting during parallel download process
+- download_metrics.jsonl transfer metrics
+- pairs_ready.jsonl "pair ready" queue: a "start" header with the run id, then one event per
+  ready pair, closed with a "done" event
 
 Example Usage:
 EARTHDATA_TOKEN="your_token" python 4_download_s1_scenes.py
@@ -32,51 +49,120 @@ EARTHDATA_TOKEN="your_token" python 4_download_s1_scenes.py
 import os
 import sys
 import pandas as pd
-import pyarrow.dataset as ds
 import asf_search as asf
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import catalog_index
+import pair_table
+import download_plan
+import pair_schedule
+import slc_download
+import slc_store
+
 # ——— Configuration —————————————————————————————
-PAIRS_CSV   = "csv_pairs/pairs_june21_mar25_baseline.csv"
+PAIRS_FILE  = "pairs_june21_mar25_baseline.parquet"   # step-3 pair table (legacy .csv also read)
 CATALOG_DIR = (
     "/mnt/Disk_2/"
     "data/pyarrow_hive/InSAR_Forest_Disturbance_Dataset"
 )
 OUT_DIR     = "/mnt/Disk_2/data/SLC/raw"
-PARALLEL    = 4  # number of simultaneous downloads
+PARALLEL    = 4   # simultaneous downloads to start with
+MIN_PARALLEL = 2  # adaptive concurrency bounds: in-flight transfers move within these
+MAX_PARALLEL = 16 #   following throughput (up while it grows, halved when the server throttles)
+VERIFY_MD5  = False  # also checksum archives whose size already matches (reads each file in full)
+READY_FILE  = os.path.join(OUT_DIR, pair_schedule.READY_NAME)  # "pair ready" queue for the SNAP stage
+SLC_BUDGET_GB = None  # disk budget for this table's zips in OUT_DIR (None = unlimited); run the
+                      # SNAP stage alongside, it deletes zips once every pair using them is processed
+METRICS_FILE = os.path.join(OUT_DIR, "download_metrics.jsonl")  # per-file / progress metrics (JSON lines)
+PROGRESS_INTERVAL = 30  # seconds between live progress lines (and stall checks)
+PAIR_COLUMNS = ["master_fileID", "slave_fileID", "master_id", "slave_id", "track", "master_time", "slave_time"]
 
 os.makedirs(OUT_DIR, exist_ok=True)
 
-# 1. Load the final, baseline‐filtered pairs list
-pairs = pd.read_csv(PAIRS_CSV, dtype=str)
-if not {"master_fileID", "slave_fileID"}.issubset(pairs.columns):
-    sys.exit(f"ERROR: {PAIRS_CSV} must contain master_fileID & slave_fileID")
-
-# 2. Build fileID → download_url map from the catalog
-ds_cat = ds.dataset(CATALOG_DIR, format="parquet", partitioning="hive")
-tbl    = ds_cat.to_table(columns=["fileID", "download_url"])
-catalog= tbl.to_pandas().drop_duplicates("fileID")
-url_map= dict(zip(catalog["fileID"], catalog["download_url"]))
-
-# 3. Collect all URLs for master and slave scenes
-urls = []
-for role in ("master_fileID", "slave_fileID"):
-    for fid in pairs[role]:
-        url = url_map.get(fid)
-        if url:
-            urls.append(url)
+# 1. Load the final, baseline‐filtered pairs list; drop pairs already processed (SLC store log)
+pairs = pair_table.read_pairs(PAIRS_FILE, columns=PAIR_COLUMNS)
+if pairs[["master_fileID", "slave_fileID"]].isna().any().any():
+    sys.exit(f"ERROR: {PAIRS_FILE} must contain master_fileID & slave_fileID")
+requeue = set()
+
+
+def evicted(fids):
+    # the store dropped referenced scenes to stay in budget: fetch them again later
+    queue.evicted(fids)
+    requeue.update(fids)
+
+
+store = slc_store.SLCStore(OUT_DIR, pairs, budget_bytes=SLC_BUDGET_GB and SLC_BUDGET_GB * 1e9, on_evict=evicted)
+total = len(pairs)
+pairs = store.processing_order()
+print(f"{len(pairs)}/{total} pairs pending; at most {slc_store.peak_residency(pairs)} scenes needed on disk at once")
+
+# 2. Look up download metadata for the paired scenes in the catalog key index
+index = catalog_index.open_index(CATALOG_DIR)
+fids  = download_plan.unique_scenes(pairs)
+meta  = index.lookup(fids, ["download_url", "scene_id", "fileName", "bytes", "md5sum"])
+
+# 3. Plan: each scene once, skipping archives already in OUT_DIR that match the catalog
+plan = download_plan.plan_downloads(fids, meta, OUT_DIR, verify_md5=VERIFY_MD5, workers=PARALLEL)
+print(download_plan.summarize(plan, requested=2 * len(pairs)))
+todo = download_plan.to_download(plan)
+for r in todo[todo["status"] == download_plan.CORRUPT].itertuples(index=False):
+    if pd.notna(r.bytes) and os.path.getsize(r.path) < r.bytes:
+        # a truncated archive is a prefix of the real one: resume it as a partial download
+        print(f"  ↻ Resuming truncated archive {os.path.basename(r.path)}")
+        os.replace(r.path, r.path + slc_download.PART_SUFFIX)
+    else:
+        print(f"  ❌ Removing corrupt archive {os.path.basename(r.path)}")
+        os.remove(r.path)
+
+# Pair-ordered schedule: fetch scenes so that complete pairs appear as early as possible
+have  = set(plan.loc[plan["status"].isin([download_plan.OK, download_plan.PRESENT]), "fileID"])
+queue = pair_schedule.PairReadyQueue(READY_FILE, pairs, have)
+print(f"{queue.ready}/{len(pairs)} pairs already on disk; pair-ready events in {READY_FILE}")
+todo_ids = set(todo["fileID"])
+order = [fid for fid in pair_schedule.pair_order(pairs, have) if fid in todo_ids]
+todo  = todo.set_index("fileID").loc[order].reset_index()
+if todo.empty:
+    queue.close()
+    sys.exit("✅ All scenes already downloaded.")
 
 # 4. Authenticate to ASF
 token = os.getenv("EARTHDATA_TOKEN")
 if not token:
     sys.exit("ERROR: EARTHDATA_TOKEN not set in environment")
 session = asf.ASFSession().auth_with_token(token)
- # 5. Parallel download
-print(f"Downloading {len(urls)} scenes to {OUT_DIR} using {PARALLEL} parallel processes...")
-asf.download_urls(
-    urls=urls,
-    path=OUT_DIR,
-    session=session,
-    processes=PARALLEL
-)
-print("✅ Download complete.")
 
+
+def finished(path, err):
+    fid = fid_of[path]
+    if store.budget is not None:
+        store.unreserve(fid)
+    if err is None:
+        queue.completed([fid])
+
+
+# 5. Parallel download: chunked, resumable, verified against the catalog size / md5sum;
+#    each transfer waits for room in the SLC budget, which processed pairs free up
+# without a budget there is nothing to wait for: no per-transfer reservation
+reserve = (lambda r: store.reserve(r.fileID, r.bytes)) if store.budget is not None else None
+failed  = []
+with slc_download.DownloadMonitor(METRICS_FILE, interval=PROGRESS_INTERVAL) as monitor:
+    while not todo.empty:
+        print(f"Downloading {len(todo)} scenes to {OUT_DIR} with {MIN_PARALLEL}-{MAX_PARALLEL} adaptive parallel downloads...")
+        fid_of  = dict(zip(todo["path"], todo["fileID"]))
+        results = slc_download.download_all(
+            todo, session, workers=MAX_PARALLEL, min_workers=MIN_PARALLEL, start_workers=PARALLEL,
+            on_start=reserve, on_done=finished, monitor=monitor
+        )
+        failed += [p for p, err in results.items() if err]
+        # scenes evicted under the budget before their pairs were processed go round again
+        store.refresh()
+        again   = [fid for fid in plan["fileID"] if fid in requeue and fid in store.pending_scenes()]
+        requeue = set()
+        todo    = plan.set_index("fileID").loc[again].reset_index()
+print(f"Transfer metrics in {METRICS_FILE}")
+queue.close()
+print(f"{queue.ready}/{len(pairs)} pairs ready for processing")
+if failed:
+    sys.exit(f"❌ {len(failed)} downloads failed; rerun to resume them")
+print("✅ Download complete.")
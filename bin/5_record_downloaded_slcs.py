@@ -14,11 +14,13 @@ Input Requirements:
 Processing Steps:
 1. Scans specified directory for SAFE archive files
 2. Extracts fileID from each archive filename
-3. Creates DataFrame with downloaded scene inventory
+3. Creates DataFrame with downloaded scene inventory, enriched with startTime/track from the
+   catalog key index when CATALOG_DIR is set
 4. Outputs CSV catalog for downstream processing verification
 
 Output:
-- CSV file containing fileID column with all downloaded scenes
+- CSV file containing fileID column with all downloaded scenes (plus scene_id, startTime, track,
+  orbitDirection when the catalog is available)
 - Used for validation and tracking in subsequent processing steps
 
 Example Usage:
@@ -26,11 +28,19 @@ python 5_record_downloaded_slcs.py
 """
 
 import os
+import sys
 import pandas as pd
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import catalog_index
+
 # ——— Configuration ————————————————————————
-RAW_DIR    = "/mnt/Disk_2/data/SLC/raw"
-OUTPUT_CSV = "downloaded_slcs.csv"
+RAW_DIR     = "/mnt/Disk_2/data/SLC/raw"
+OUTPUT_CSV  = "downloaded_slcs.csv"
+CATALOG_DIR = (
+    "/mnt/Disk_2/"
+    "data/pyarrow_hive/InSAR_Forest_Disturbance_Dataset"
+)  # set to None to record fileIDs only
 
 def list_slcs(raw_dir):
     """
@@ -47,6 +57,19 @@ def list_slcs(raw_dir):
 def main():
     slcs = list_slcs(RAW_DIR)
     df   = pd.DataFrame({"fileID": slcs})
+
+    # archive names are scene names; attach catalog fileID/startTime/track via the key index
+    if CATALOG_DIR:
+        rows = catalog_index.open_index(CATALOG_DIR).lookup(
+            slcs, ["fileID", "startTime", "track", "orbitDirection"], by="scene_id"
+        )
+        meta = pd.DataFrame.from_dict(rows, orient="index")
+        if not meta.empty:
+            df = df.rename(columns={"fileID": "scene_id"}).join(meta, on="scene_id")
+            df = df[["fileID", "scene_id", "startTime", "track", "orbitDirection"]]
+            df["fileID"] = df["fileID"].fillna(df["scene_id"])   # archives not in the catalog keep their name
+            df["track"]  = df["track"].astype("Int64")
+
     df.to_csv(OUTPUT_CSV, index=False)
     print(f"Wrote {len(df)} downloaded fileIDs to {OUTPUT_CSV}")
 
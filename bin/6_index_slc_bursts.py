@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Indexes the IW bursts of downloaded Sentinel-1 SLC archives straight from their SAFE zip annotations
+
+@Time    : 2026-10-17
+@Author  : Colm Keyes
+@Email   : keyesco@tcd.ie
+@File    : 6_index_slc_bursts.py
+
+Input Requirements:
+- Directory of downloaded SLC .zip archives from step 4
+- (Optional) AOI bounding box to report the burst ranges that intersect it
+
+Processing Steps:
+1. Lists SLC zips in RAW_DIR that are not yet in the burst table
+2. Opens each zip with zipfile (no extraction) and parses one annotation XML per IW subswath
+3. Records swath, burst index, azimuth time, azimuth ANX time and the burst footprint
+   interpolated from the geolocation grid
+4. Writes/extends the burst table as a single Parquet file
+5. Prints the per-scene, per-swath burst ranges intersecting the AOI, i.e. the
+   iw_swath/first_burst_index/last_burst_index arguments for sentinel1slc.topsar_split
+
+Output:
+- Parquet burst table: scene_id, swath, burst_index, azimuth_time, azimuth_anx_time,
+  lines_per_burst, geometry (WKB), xmin, ymin, xmax, ymax
+
+Example Usage:
+python 6_index_slc_bursts.py
+"""
+
+import os
+import sys
+from shapely.geometry import box
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import burst_index
+
+# ——— Configuration ————————————————————————
+RAW_DIR     = "/mnt/Disk_2/data/SLC/raw"
+OUT_PARQUET = "/mnt/Disk_2/data/SLC/slc_bursts.parquet"
+AOI_BBOX    = None      # e.g. (113.0, -2.5, 114.5, -1.0); None to skip the AOI report
+WORKERS     = 4
+
+
+def main():
+    zips = [os.path.join(RAW_DIR, fn) for fn in os.listdir(RAW_DIR) if fn.endswith(".zip")]
+    table = burst_index.build_burst_index(zips, OUT_PARQUET, workers=WORKERS)
+    print(f"✅ {table.num_rows} bursts from {len(set(table.column('scene_id').to_pylist()))} scenes in {OUT_PARQUET}")
+
+    if AOI_BBOX:
+        ranges = burst_index.bursts_for_aoi(table, box(*AOI_BBOX))
+        print(f"\n{len(ranges)} scene/swath burst ranges intersect AOI {AOI_BBOX}:")
+        for scene_id, swath, first, last in ranges:
+            print(f"  {scene_id} {swath}: bursts {first}–{last}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Compacts the Hive-partitioned Sentinel-1 catalog: merges part files, drops duplicate fileIDs and re-sorts each partition
+
+@Time    : 2026-10-17
+@Author  : Colm Keyes
+@Email   : keyesco@tcd.ie
+@File    : compact_s1_catalog.py
+
+Input Requirements:
+- Partitioned Parquet catalog from step 1 (1_generate_s1_catalog.py)
+
+Processing Steps:
+1. Finds year=/month= partitions holding several part files (left by repeated or tiled catalog runs)
+2. Reads each partition, keeps the most recent row per fileID
+3. Sorts rows by orbitDirection/track/ymin/startTime and writes one file with bounded row groups
+4. Writes the compacted file into the partition under a hidden name, renames it into place and then
+   removes the old part files, so readers never miss rows; they may briefly see duplicates,
+   which query_catalog, the track layout and the key index drop by fileID
+5. Rebuilds the orbitDirection/track layout, if present, and the key index from the compacted catalog
+
+Output:
+- One part-compacted.parquet per partition, no duplicate fileIDs
+
+Example Usage:
+python compact_s1_catalog.py
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import s1_catalog as cat
+import catalog_index
+
+# ——— Configuration —————————————————————————————
+CATALOG_DIR = (
+    "/mnt/Disk_2/"
+    "data/pyarrow_hive/InSAR_Forest_Disturbance_Dataset"
+)
+TRACK_DIR   = CATALOG_DIR + "_by_track"
+MIN_FILES   = 2      # set to 1 to also dedupe/re-sort partitions that are already a single file
+
+
+def main():
+    summaries = cat.compact_catalog(CATALOG_DIR, min_files=MIN_FILES)
+    for s in summaries:
+        print(f"  {s['partition']}: {s['files']} files, {s['rows_in']} → {s['rows_out']} rows")
+
+    dropped = sum(s["rows_in"] - s["rows_out"] for s in summaries)
+    print(f"✅ Compacted {len(summaries)} partitions, dropped {dropped} duplicate rows")
+
+    if summaries and os.path.isdir(TRACK_DIR):
+        n_tracks = cat.write_track_layout(CATALOG_DIR, TRACK_DIR)
+        print(f"✅ Rebuilt {n_tracks} track partitions in {TRACK_DIR}")
+
+    if summaries:
+        catalog_index.open_index(CATALOG_DIR)
+
+if __name__ == "__main__":
+    main()
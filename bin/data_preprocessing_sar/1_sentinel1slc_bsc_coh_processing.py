@@ -19,6 +19,9 @@ import sys
 import os
 sys.path.append(r"/home/colm-the-conjurer/VSCode/workspace/InSAR_Forest_Disturbance_Dataset/src")
 import sentinel1slc as slc
+import pair_table
+import pair_schedule
+import slc_store
 
 # Define input parameters
 pols = ['VH', 'VV']  # Available polarizations
@@ -35,8 +38,18 @@ window_size = [[2,10],[2, 8], [3, 12], [4, 15]]  # Multiple window sizes for dif
 base_path = "/home/colm-the-conjurer/VSCode/workspace/InSAR_Forest_Disturbance_Dataset"
 data_base_path = "/mnt/Disk_2/data"
 SLC_path = os.path.join(data_base_path, "SLC", "raw")
-path_asf_csv = os.path.join(base_path, "bin", "csv_pairs", "pairs_june21_mar25_baseline.csv")
+# step-3 pair table, the same one 4_download_s1_scenes.py downloads from (read with pair_table.read_pairs)
+path_asf_csv = os.path.join(base_path, "bin", "pairs_june21_mar25_baseline.parquet")
 outpath = os.path.join(base_path, "data", "products", "sar_processed")
+# "pair ready" queue written by 4_download_s1_scenes.py: process pairs as their downloads finish
+# (None processes the table in order, skipping pairs whose archives are missing)
+ready_queue = os.path.join(SLC_path, "pairs_ready.jsonl")
+# set to time.time() when starting before the downloader: a queue left by an earlier download
+# run then does not end processing with its "done" event; None follows whatever run is there
+ready_since = None
+# Delete each raw SLC zip once every pair using it has been processed (lets 4_download_s1_scenes.py
+# run within SLC_BUDGET_GB); False keeps all zips
+evict_processed = True
 
 # Create output directory if it doesn't exist
 if not os.path.exists(outpath):
@@ -48,35 +61,58 @@ elif mode == 'coherence':
     outpath_window = '_coherence_window_'
 
 print(f"Processing mode: {mode}")
-print(f"Input CSV: {path_asf_csv}")
+print(f"Pair table: {path_asf_csv}")
 print(f"SLC data path: {SLC_path}")
 print(f"Output path: {outpath}")
 
-# Loop over polarizations and window sizes
-for pol in pols:
-    print(f"\nProcessing polarization: {pol}")
-    for ix, window in enumerate(window_size):
-        print(f"Processing window size: {window}")
-        
-        # Create output path for this configuration
-        window_size_m = int(sentinel1_GroundRange_resolution[0] * window[0])
-        output_dir = os.path.join(
-            outpath,
-            f"{window_size_m}m_window",
-            f"pol_{pol}{outpath_window}{window_size_m}"
-        )
-        
-        slc.main(
-            pols=pol,
-            iw_swath=None,  # Process all swaths automatically
-            first_burst_index=None,  # Process all bursts
-            last_burst_index=None,   # Process all bursts
-            coh_window_size=window,
-            mode=mode,
-            speckle_filter='Lee',
-            speckle_filter_size=[5, 5],
-            product_type=product_type,
-            outpath=output_dir,
-            SLC_path=SLC_path,
-            path_asf_csv=path_asf_csv
-        )
+
+def process(pol, window, **kwargs):
+    # Create output path for this configuration
+    window_size_m = int(sentinel1_GroundRange_resolution[0] * window[0])
+    output_dir = os.path.join(
+        outpath,
+        f"{window_size_m}m_window",
+        f"pol_{pol}{outpath_window}{window_size_m}"
+    )
+
+    slc.main(
+        pols=pol,
+        iw_swath=None,  # Process all swaths automatically
+        first_burst_index=None,  # Process all bursts
+        last_burst_index=None,   # Process all bursts
+        coh_window_size=window,
+        mode=mode,
+        speckle_filter='Lee',
+        speckle_filter_size=[5, 5],
+        product_type=product_type,
+        outpath=output_dir,
+        SLC_path=SLC_path,
+        path_asf_csv=path_asf_csv,
+        **kwargs
+    )
+
+
+if evict_processed:
+    # Pair by pair (every polarization and window), then release the pair's scenes to the
+    # SLC store, which deletes zips no pending pair needs any more
+    store = slc_store.SLCStore(SLC_path, pair_table.read_pairs(path_asf_csv))
+    pending = store.processing_order()
+    print(f"{len(pending)} pairs pending, in locality order")
+    pair_iter = pair_schedule.follow_ready(ready_queue, pending, since=ready_since) if ready_queue else pending.iterrows()
+    for idx, pair in pair_iter:
+        fids = (str(pair['master_fileID']), str(pair['slave_fileID']))
+        if not all(os.path.exists(store.path_of[fid]) for fid in fids):
+            print(f"Warning: SLCs for {fids[0]} / {fids[1]} not on disk; leaving the pair pending")
+            continue
+        store.touch(*fids)
+        for pol in pols:
+            for window in window_size:
+                process(pol, window, pairs=pending.loc[[idx]])
+        store.release(*fids)
+else:
+    # Loop over polarizations and window sizes
+    for pol in pols:
+        print(f"\nProcessing polarization: {pol}")
+        for ix, window in enumerate(window_size):
+            print(f"Processing window size: {window}")
+            process(pol, window, ready_queue=ready_queue, ready_since=ready_since)
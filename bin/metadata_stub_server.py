@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the ASF product metadata service, for exercising batched baseline fetches under load
+
+@Time    : 2026-10-17
+@Author  : Colm Keyes
+@Email   : keyesco@tcd.ie
+@File    : metadata_stub_server.py
+
+Serves GET /products?ids=<fileID>,<fileID>,... with a JSON list of
+{"properties", "baseline", "geometry"} records in the shape asf_metadata caches.
+Records are synthetic but deterministic per fileID: startTime is parsed from the
+scene name and the prePosition is one point at a 7,071 km orbit radius offset by
+~100 m per axis, so baselines come out in a realistic range (mostly < 300 m).
+
+Latency and failures are injected to exercise timeouts and retries:
+- LATENCY_S seconds (± JITTER_S) per request
+- FAIL_RATE of requests answer HTTP 503
+- MISSING_RATE of fileIDs are left out of the answer (unknown products)
+
+Example Usage:
+python metadata_stub_server.py
+# then BaselineCalculator(..., metadata_url="http://127.0.0.1:8765").run()
+"""
+
+import json
+import time
+import random
+import hashlib
+import urllib.parse
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+# — Configuration ——————————————————————————————
+HOST         = "127.0.0.1"
+PORT         = 8765
+LATENCY_S    = 0.5
+JITTER_S     = 0.3
+FAIL_RATE    = 0.1
+MISSING_RATE = 0.01
+ORBIT_RADIUS = 7_071_000.0   # metres
+
+
+def fake_record(fileID: str) -> dict:
+    """
+    Deterministic synthetic metadata for one fileID.
+    """
+    rng = np.random.default_rng(int(hashlib.md5(fileID.encode()).hexdigest()[:8], 16))
+    parts = fileID.split("_")
+    stamp = next((p for p in parts if len(p) == 15 and p[8] == "T"), "20210101T000000")
+    start = datetime.strptime(stamp, "%Y%m%dT%H%M%S").isoformat() + "Z"
+
+    pos = np.array([ORBIT_RADIUS, 0.0, 0.0]) + rng.normal(0, 100, 3)
+    return {
+        "properties": {"fileID": fileID, "sceneName": fileID.replace("-SLC", ""), "startTime": start},
+        "baseline":   {"stateVectors": {"positions": {"prePosition": pos.tolist()}}},
+        "geometry":   None,
+    }
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        if url.path != "/products":
+            self.send_error(404)
+            return
+
+        time.sleep(max(0.0, LATENCY_S + random.uniform(-JITTER_S, JITTER_S)))
+        if random.random() < FAIL_RATE:
+            self.send_error(503, "injected failure")
+            return
+
+        ids = [i for i in urllib.parse.parse_qs(url.query).get("ids", [""])[0].split(",") if i]
+        body = json.dumps([fake_record(i) for i in ids if random.random() >= MISSING_RATE]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        pass   # one line per request would drown the client's progress output
+
+
+if __name__ == "__main__":
+    server = ThreadingHTTPServer((HOST, PORT), Handler)
+    print(f"Metadata stub on http://{HOST}:{PORT}/products (latency {LATENCY_S}s, fail rate {FAIL_RATE})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("✅ Stopped")
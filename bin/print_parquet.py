@@ -3,7 +3,7 @@
 import pyarrow.parquet as pq
 import pyarrow.dataset as ds
 import pandas as pd
-from shapely import wkb
+import shapely
 
 # ——— Configuration —————————————————————————————
 # Path to your Hive directory of Parquet files
@@ -22,9 +22,9 @@ def print_hive_dataset(path):
 
     # Convert to Pandas for a nicer view
     df = table.to_pandas()
-    # If you have a WKB-encoded geometry column:
+    # If you have a WKB-encoded geometry column, decode it in one vectorised call:
     if df["geometry"].dtype == object and isinstance(df["geometry"].iat[0], (bytes, bytearray)):
-        df["geometry"] = df["geometry"].apply(wkb.loads)
+        df["geometry"] = shapely.from_wkb(df["geometry"].to_numpy())
 
     print("\n=== Pandas DataFrame (first 5 rows) ===")
     print(df.head())
@@ -39,6 +39,19 @@ def print_single_file(path):
     print("=== Single Parquet File ===")
     print(table)
 
+    # GeoParquet metadata and per-row-group bbox statistics written by 1_generate_s1_catalog.py
+    meta = pq.ParquetFile(path).metadata
+    geo  = (table.schema.metadata or {}).get(b"geo")
+    if geo:
+        print("\nGeoParquet metadata:", geo.decode())
+    names = [meta.schema.column(i).name for i in range(meta.num_columns)]
+    if "xmin" in names:
+        for rg in range(meta.num_row_groups):
+            stats = {n: meta.row_group(rg).column(names.index(n)).statistics for n in ("xmin", "ymin", "xmax", "ymax")}
+            print(f"  row group {rg}: {meta.row_group(rg).num_rows} rows, "
+                  f"bbox=({stats['xmin'].min:.2f}, {stats['ymin'].min:.2f}, "
+                  f"{stats['xmax'].max:.2f}, {stats['ymax'].max:.2f})")
+
 
 if __name__ == "__main__":
     print(">>> Hive‐partitioned dataset:")
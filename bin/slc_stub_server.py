@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the ASF SLC download endpoint, for exercising resumable downloads
+
+@Time    : 2026-10-17
+@Author  : Colm Keyes
+@Email   : keyesco@tcd.ie
+@File    : slc_stub_server.py
+
+Serves the files in SERVE_DIR at http://HOST:PORT/<file name> with HTTP Range support
+(206 Partial Content), the way the ASF / S3 download URLs behave.
+
+Faults are injected to exercise resume and verification:
+- DROP_RATE of responses close the connection part-way through the body
+- RATE_MBPS caps each response's throughput (0 = unthrottled)
+- MAX_CONNECTIONS concurrent responses; further requests get HTTP 503 (as a throttling
+  server would), which is what adaptive download concurrency reacts to
+
+Example Usage:
+python slc_stub_server.py
+# then point catalog download_url values (or a download plan's url column) at
+# http://127.0.0.1:8766/<scene>.zip
+"""
+
+import os
+import re
+import time
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# — Configuration ——————————————————————————————
+HOST            = "127.0.0.1"
+PORT            = 8766
+SERVE_DIR       = "/mnt/Disk_2/data/SLC/stub"
+DROP_RATE       = 0.2
+RATE_MBPS       = 0
+MAX_CONNECTIONS = 8
+BLOCK           = 256 * 1024
+
+RANGE_RE = re.compile(r"bytes=(\d+)-(\d*)$")
+_active = threading.BoundedSemaphore(MAX_CONNECTIONS)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        path = os.path.join(SERVE_DIR, os.path.basename(self.path.split("?")[0]))
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+        if not _active.acquire(blocking=False):
+            self.send_error(503, "too many connections")
+            return
+        try:
+            self._serve(path)
+        finally:
+            _active.release()
+
+    def _serve(self, path: str):
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        m = RANGE_RE.match(self.headers.get("Range", ""))
+        if m:
+            start = int(m.group(1))
+            end = int(m.group(2)) if m.group(2) else size - 1
+            if start >= size:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        length = end - start + 1
+        self.send_header("Content-Length", str(length))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+
+        # a dropped response stops somewhere in the body and closes the socket
+        stop_at = random.randint(0, length - 1) if random.random() < DROP_RATE and length > 1 else length
+        with open(path, "rb") as f:
+            f.seek(start)
+            sent = 0
+            while sent < stop_at:
+                block = f.read(min(BLOCK, stop_at - sent))
+                self.wfile.write(block)
+                sent += len(block)
+                if RATE_MBPS:
+                    time.sleep(len(block) / (RATE_MBPS * 1e6))
+        if stop_at < length:
+            self.close_connection = True
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+if __name__ == "__main__":
+    server = ThreadingHTTPServer((HOST, PORT), Handler)
+    print(f"SLC stub serving {SERVE_DIR} on http://{HOST}:{PORT}/ (drop rate {DROP_RATE}, max {MAX_CONNECTIONS} connections)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("✅ Stopped")
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+Shared ASF product metadata access with an in-memory LRU in front of a persistent SQLite cache
+"""
+"""
+@Time    : 2026-10-17
+@Author  : Colm Keyes
+@Email   : keyesco@tcd.ie
+@File    : asf_metadata.py
+"""
+
+import os
+import json
+import time
+import random
+import sqlite3
+import threading
+import urllib.parse
+import urllib.request
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import asf_search as asf
+
+DEFAULT_CACHE = os.path.expanduser("~/.cache/insar_forest_disturbance/asf_metadata.sqlite")
+DEFAULT_TTL   = 30 * 86_400     # seconds; ASF metadata for a published SLC practically never changes
+
+# The parts of an ASF product the pipeline reads, in a form that round-trips through JSON
+CachedProduct = namedtuple("CachedProduct", ["properties", "baseline", "geometry"])
+
+
+def to_cached(prod) -> CachedProduct:
+    """
+    Reduce an asf_search product to the properties / baseline / geometry the pipeline uses.
+    """
+    if isinstance(prod, CachedProduct):
+        return prod
+    gj = prod.geojson() if callable(prod.geojson) else prod.geojson
+    return CachedProduct(dict(prod.properties), getattr(prod, "baseline", None) or {}, gj.get("geometry"))
+
+
+class MetadataCache:
+    """
+    Two-level product metadata cache keyed by fileID.
+
+    Lookups hit a bounded in-memory LRU first and then a SQLite store on disk, so a scene
+    fetched once is served locally by every later run until its entry is older than `ttl`.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE, ttl: float = DEFAULT_TTL, lru_size: int = 4096):
+        """
+        Args:
+            path (str): SQLite file for the persistent store (created with its directory if missing).
+            ttl (float): seconds before a stored entry is refetched; None never expires.
+            lru_size (int): entries held in memory.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path     = path
+        self.ttl      = ttl
+        self.lru_size = lru_size
+        self._lru     = OrderedDict()
+        self._lock    = threading.Lock()
+        self.conn     = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS products (fileID TEXT PRIMARY KEY, fetched REAL, record TEXT) WITHOUT ROWID"
+        )
+        self.hits = self.misses = 0
+
+    def _remember(self, fileID: str, product: CachedProduct):
+        self._lru[fileID] = product
+        self._lru.move_to_end(fileID)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def get_many(self, fileIDs) -> dict:
+        """
+        Cached products for the given fileIDs; missing or expired entries are simply absent.
+        """
+        ids = list(dict.fromkeys(fileIDs))   # fileIDs may be a one-shot iterator; it is counted below
+        out, todo = {}, []
+        with self._lock:
+            for fid in ids:
+                if fid in self._lru:
+                    self._lru.move_to_end(fid)
+                    out[fid] = self._lru[fid]
+                else:
+                    todo.append(fid)
+
+            oldest = time.time() - self.ttl if self.ttl is not None else float("-inf")
+            for i in range(0, len(todo), 500):
+                chunk = todo[i:i + 500]
+                rows = self.conn.execute(
+                    f"SELECT fileID, record FROM products WHERE fetched >= ? AND fileID IN ({','.join('?' * len(chunk))})",
+                    [oldest, *chunk]
+                ).fetchall()
+                for fid, record in rows:
+                    out[fid] = CachedProduct(**json.loads(record))
+                    self._remember(fid, out[fid])
+
+            self.hits   += len(out)
+            self.misses += len(ids) - len(out)
+        return out
+
+    def get(self, fileID: str):
+        return self.get_many([fileID]).get(fileID)
+
+    def put_many(self, products: dict):
+        """
+        Store {fileID: CachedProduct} in both the LRU and the persistent store.
+        """
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO products VALUES (?, ?, ?)",
+                [(fid, now, json.dumps(p._asdict(), default=str)) for fid, p in products.items()]
+            )
+            for fid, p in products.items():
+                self._remember(fid, p)
+
+    def put(self, fileID: str, product: CachedProduct):
+        self.put_many({fileID: product})
+
+
+# — Search backends ———————————————————————————————
+# A search function takes (fileIDs, timeout) and returns products exposing .properties["fileID"].
+
+def asf_search(fileIDs, timeout: float = None) -> list:
+    """
+    asf.product_search with a client-side timeout; a call that overruns is abandoned (its
+    thread finishes in the background) and reported as a TimeoutError so it can be retried.
+    """
+    pool = ThreadPoolExecutor(max_workers=1)
+    try:
+        return pool.submit(asf.product_search, list(fileIDs)).result(timeout=timeout)
+    finally:
+        pool.shutdown(wait=False)
+
+
+def http_search(base_url: str):
+    """
+    Search function for a metadata service answering GET <base_url>/products?ids=a,b,... with a
+    JSON list of {"properties", "baseline", "geometry"} (e.g. bin/metadata_stub_server.py).
+    """
+    def search(fileIDs, timeout: float = None) -> list:
+        url = f"{base_url.rstrip('/')}/products?" + urllib.parse.urlencode({"ids": ",".join(fileIDs)})
+        with urllib.request.urlopen(url, timeout=timeout) as resp:
+            return [CachedProduct(**r) for r in json.load(resp)]
+    return search
+
+
+def search_with_retry(search_fn, fileIDs, timeout: float = 60.0, retries: int = 4, backoff: float = 1.0) -> list:
+    """
+    Call search_fn, retrying failures (errors and timeouts) with jittered exponential backoff:
+    backoff, 2 * backoff, 4 * backoff, ... seconds.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return search_fn(fileIDs, timeout=timeout)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = backoff * 2 ** attempt * random.uniform(1.0, 1.25)
+            print(f"  ↻ product_search for {len(fileIDs)} fileIDs failed ({e!r}); retry {attempt + 1}/{retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def fetch_products(fileIDs, cache: MetadataCache = None, chunk_size: int = 250, search_fn=None,
+                   workers: int = 4, timeout: float = 60.0, retries: int = 4, backoff: float = 1.0) -> dict:
+    """
+    Product metadata for many fileIDs, requesting whatever the cache lacks in batched searches.
+
+    Batches run on a bounded thread pool, each with a per-request timeout and exponential-backoff
+    retries; a batch that still fails is reported and its fileIDs are left out (and uncached, so
+    the next run asks again).
+
+    Args:
+        fileIDs (iterable): fileIDs; duplicates are requested once.
+        cache (MetadataCache): consulted first and filled with every product fetched.
+        chunk_size (int): fileIDs per search request.
+        search_fn: (fileIDs, timeout) -> products; asf_search by default, http_search(url) for a
+                   stand-in service.
+        workers (int): batches in flight at once.
+        timeout (float): seconds per request.
+        retries (int): retries per batch after the first attempt.
+        backoff (float): first retry delay in seconds, doubled on each further retry.
+
+    Returns:
+        dict: fileID -> CachedProduct; fileIDs not found (or whose batch failed) are absent.
+    """
+    search_fn = search_fn or asf_search
+    ids  = list(dict.fromkeys(fileIDs))
+    out  = cache.get_many(ids) if cache is not None else {}
+    todo = [fid for fid in ids if fid not in out]
+    chunks = [todo[i:i + chunk_size] for i in range(0, len(todo), chunk_size)]
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(search_with_retry, search_fn, c, timeout, retries, backoff): c for c in chunks}
+        for fut in as_completed(futures):
+            chunk = futures[fut]
+            try:
+                prods = fut.result()
+            except Exception as e:
+                failed += len(chunk)
+                print(f"  ❌ product_search for {len(chunk)} fileIDs failed after {retries} retries: {e!r}")
+                continue
+            wanted = set(chunk)
+            found  = {}
+            for prod in prods:
+                fid = prod.properties.get("fileID")
+                if fid in wanted:
+                    found[fid] = to_cached(prod)
+            if cache is not None:
+                cache.put_many(found)
+            out.update(found)
+
+    print(
+        f"Metadata for {len(ids)} scenes: {len(ids) - len(todo)} cached, {len(todo)} requested in "
+        f"{len(chunks)} batches, {failed} in failed batches, {len(ids) - len(out) - failed} not found"
+    )
+    return out
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorised temporal / perpendicular baselines for the scenes of one track from stacked state vectors
+"""
+"""
+@Time    : 2026-10-17
+@Author  : Colm Keyes
+@Email   : keyesco@tcd.ie
+@File    : baselines.py
+"""
+
+import numpy as np
+import pandas as pd
+
+DAY_NS = 86_400 * 10**9
+
+
+def to_ns(times) -> np.ndarray:
+    """
+    Acquisition times (ISO strings / datetimes) as int64 UTC nanoseconds.
+    """
+    return pd.to_datetime(pd.Series(times), utc=True).dt.as_unit("ns").astype("int64").to_numpy()
+
+
+def stack_positions(positions) -> np.ndarray:
+    """
+    (n, 3) float64 array from per-scene ECEF vectors; missing vectors (None) become NaN rows.
+    """
+    out = np.full((len(positions), 3), np.nan)
+    for i, p in enumerate(positions):
+        if p is not None:
+            out[i] = p
+    return out
+
+
+def baseline_matrix(times_ns: np.ndarray, positions: np.ndarray):
+    """
+    Full n x n baselines for one track by broadcasting.
+
+    Args:
+        times_ns (np.ndarray): (n,) int64 acquisition times.
+        positions (np.ndarray): (n, 3) ECEF prePositions in metres.
+
+    Returns:
+        (temp, perp): temp[i, j] whole days from scene i to scene j (floored like timedelta.days),
+        perp[i, j] distance in metres between the prePositions (NaN where a vector is missing).
+    """
+    t = np.asarray(times_ns, dtype=np.int64)
+    p = np.asarray(positions, dtype=float)
+    temp = (t[None, :] - t[:, None]) // DAY_NS
+    perp = np.sqrt(((p[None, :, :] - p[:, None, :]) ** 2).sum(axis=-1))
+    return temp, perp
+
+
+def pair_baselines(times_ns: np.ndarray, positions: np.ndarray, ref: np.ndarray, sec: np.ndarray):
+    """
+    Baselines for a candidate subset of (ref, sec) row positions, without forming the n x n matrix.
+
+    Returns:
+        (temp, perp): whole days from ref to sec (floored like timedelta.days) and the distance
+        in metres between their prePositions (NaN where a vector is missing).
+    """
+    t = np.asarray(times_ns, dtype=np.int64)
+    p = np.asarray(positions, dtype=float)
+    temp = (t[sec] - t[ref]) // DAY_NS
+    perp = np.linalg.norm(p[sec] - p[ref], axis=1)
+    return temp, perp
+
+
+def baseline_table(file_ids, times_ns, positions, ref=None, sec=None, track=None) -> pd.DataFrame:
+    """
+    Columnar baseline table for one track.
+
+    Args:
+        file_ids (array-like): (n,) fileIDs, row-aligned with times_ns / positions.
+        ref, sec (np.ndarray): candidate row positions; None gives every forward pair (i < j in time order).
+        track: track number copied into a "track" column if given.
+
+    Returns:
+        pd.DataFrame: Reference, Secondary, temp_baseline, perp_baseline (, track).
+    """
+    file_ids = np.asarray(file_ids)
+    if ref is None:
+        order = np.argsort(times_ns, kind="stable")
+        ref, sec = np.triu_indices(len(file_ids), k=1)
+        ref, sec = order[ref], order[sec]
+    temp, perp = pair_baselines(times_ns, positions, ref, sec)
+    table = pd.DataFrame({
+        "Reference":     file_ids[ref],
+        "Secondary":     file_ids[sec],
+        "temp_baseline": temp,
+        "perp_baseline": perp,
+    })
+    if track is not None:
+        table["track"] = track
+    return table
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+Builds a burst-level table (swath, burst index, azimuth time, footprint) from Sentinel-1 SLC SAFE zip annotations
+"""
+"""
+@Time    : 2026-10-17
+@Author  : Colm Keyes
+@Email   : keyesco@tcd.ie
+@File    : burst_index.py
+"""
+
+import os
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import shapely
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# annotation/s1a-iw1-slc-vv-<start>-<stop>-<orbit>-<datatake>-001.xml (not the calibration/ noise files)
+ANNOTATION_RE = re.compile(r"^[^/]+\.SAFE/annotation/s1[abc]-(iw[1-3])-slc-(vv|vh|hh|hv)-[^/]+\.xml$")
+
+BURST_SCHEMA = pa.schema([
+    ("scene_id",         pa.string()),
+    ("swath",            pa.string()),      # IW1 / IW2 / IW3
+    ("burst_index",      pa.int32()),       # 1-based, as TOPSAR-Split firstBurstIndex/lastBurstIndex
+    ("azimuth_time",     pa.timestamp("us")),
+    ("azimuth_anx_time", pa.float64()),     # seconds since ascending node; matches bursts across dates
+    ("lines_per_burst",  pa.int32()),
+    ("geometry",         pa.binary()),      # burst footprint, WKB, EPSG:4326
+    ("xmin",             pa.float64()),
+    ("ymin",             pa.float64()),
+    ("xmax",             pa.float64()),
+    ("ymax",             pa.float64()),
+])
+
+
+def annotation_members(zf: zipfile.ZipFile) -> dict:
+    """
+    Pick one annotation XML per IW subswath (bursts are identical across polarisations).
+    """
+    members = {}
+    for name in sorted(zf.namelist()):
+        m = ANNOTATION_RE.match(name)
+        if m and m.group(1).upper() not in members:
+            members[m.group(1).upper()] = name
+    return members
+
+
+def parse_bursts(root: ET.Element) -> dict:
+    """
+    Extract burst timing and footprints from one subswath annotation.
+
+    Footprints come from the geolocation grid: latitude/longitude are interpolated along each
+    grid column to the first and last line of every burst, giving a polygon per burst.
+    """
+    lines_per_burst = int(root.findtext("swathTiming/linesPerBurst"))
+    bursts = root.findall("swathTiming/burstList/burst")
+    az_time = np.array([b.findtext("azimuthTime") for b in bursts], dtype="datetime64[us]")
+    anx     = np.array([float(b.findtext("azimuthAnxTime")) for b in bursts])
+
+    points = root.findall("geolocationGrid/geolocationGridPointList/geolocationGridPoint")
+    grid = np.array([
+        [float(p.findtext("line")), float(p.findtext("pixel")), float(p.findtext("latitude")), float(p.findtext("longitude"))]
+        for p in points
+    ])
+    lines  = np.unique(grid[:, 0])
+    pixels = np.unique(grid[:, 1])
+    # the grid is regular: reshape to (line, pixel) planes
+    order = np.lexsort((grid[:, 1], grid[:, 0]))
+    lat = grid[order, 2].reshape(len(lines), len(pixels))
+    lon = grid[order, 3].reshape(len(lines), len(pixels))
+
+    n = len(bursts)
+    top    = np.arange(n) * lines_per_burst
+    bottom = top + lines_per_burst - 1
+
+    def interp(plane, at):
+        # plane (line, pixel) -> values at the requested lines for every grid column
+        return np.stack([np.interp(at, lines, plane[:, j]) for j in range(len(pixels))], axis=1)
+
+    lat_t, lon_t = interp(lat, top), interp(lon, top)
+    lat_b, lon_b = interp(lat, bottom), interp(lon, bottom)
+
+    # ring: along the top edge, then back along the bottom edge -> (n, 2 * n_pixels + 1, 2)
+    ring_lon = np.concatenate([lon_t, lon_b[:, ::-1], lon_t[:, :1]], axis=1)
+    ring_lat = np.concatenate([lat_t, lat_b[:, ::-1], lat_t[:, :1]], axis=1)
+    geoms = shapely.polygons(np.stack([ring_lon, ring_lat], axis=-1))
+
+    return {
+        "burst_index":      np.arange(1, n + 1, dtype=np.int32),
+        "azimuth_time":     az_time,
+        "azimuth_anx_time": anx,
+        "lines_per_burst":  np.full(n, lines_per_burst, dtype=np.int32),
+        "geometry":         geoms,
+    }
+
+
+def index_slc_zip(path: str) -> pa.Table:
+    """
+    Read every IW subswath annotation straight out of an SLC .zip (no extraction) into a burst table.
+    """
+    scene_id = os.path.splitext(os.path.basename(path))[0]
+    parts = []
+    with zipfile.ZipFile(path) as zf:
+        for swath, member in annotation_members(zf).items():
+            with zf.open(member) as f:
+                b = parse_bursts(ET.parse(f).getroot())
+            n = len(b["burst_index"])
+            bounds = shapely.bounds(b["geometry"])
+            parts.append(pa.table({
+                "scene_id":         pa.array([scene_id] * n, pa.string()),
+                "swath":            pa.array([swath] * n, pa.string()),
+                "burst_index":      pa.array(b["burst_index"]),
+                "azimuth_time":     pa.array(b["azimuth_time"], pa.timestamp("us")),
+                "azimuth_anx_time": pa.array(b["azimuth_anx_time"]),
+                "lines_per_burst":  pa.array(b["lines_per_burst"]),
+                "geometry":         pa.array(shapely.to_wkb(b["geometry"]), pa.binary()),
+                "xmin":             pa.array(bounds[:, 0]),
+                "ymin":             pa.array(bounds[:, 1]),
+                "xmax":             pa.array(bounds[:, 2]),
+                "ymax":             pa.array(bounds[:, 3]),
+            }, schema=BURST_SCHEMA))
+    return pa.concat_tables(parts) if parts else BURST_SCHEMA.empty_table()
+
+
+def build_burst_index(zip_paths, out_parquet: str, workers: int = 4) -> pa.Table:
+    """
+    Index a set of SLC zips into out_parquet, skipping scenes already in it.
+
+    Zips are parsed in a process pool; a zip that cannot be read is reported and left out,
+    so it is retried on the next run.
+    """
+    existing = pq.read_table(out_parquet) if os.path.exists(out_parquet) else BURST_SCHEMA.empty_table()
+    done = set(existing.column("scene_id").to_pylist())
+    todo = [p for p in sorted(zip_paths) if os.path.splitext(os.path.basename(p))[0] not in done]
+    print(f"Indexing bursts for {len(todo)} new SLCs ({len(done)} already indexed)")
+
+    tables = [existing]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path, fut in [(p, pool.submit(index_slc_zip, p)) for p in todo]:
+            try:
+                tables.append(fut.result())
+            except Exception as e:
+                print(f"  ❌ {os.path.basename(path)}: {e}")
+
+    table = pa.concat_tables(tables).sort_by([("scene_id", "ascending"), ("swath", "ascending"), ("burst_index", "ascending")])
+    tmp = out_parquet + ".tmp"
+    pq.write_table(table, tmp)
+    os.replace(tmp, out_parquet)
+    return table
+
+
+def bursts_for_aoi(bursts: pa.Table, aoi) -> list:
+    """
+    Burst ranges that intersect an AOI, ready for sentinel1slc.topsar_split.
+
+    Args:
+        bursts (pa.Table): table from build_burst_index / index_slc_zip.
+        aoi: shapely geometry in EPSG:4326.
+
+    Returns:
+        list of (scene_id, swath, first_burst_index, last_burst_index); TOPSAR-Split takes one
+        contiguous range per subswath, so each range spans the first to last intersecting burst.
+    """
+    x0, y0, x1, y1 = aoi.bounds
+    cand = bursts.filter(
+        (pc.field("xmin") <= x1) & (pc.field("xmax") >= x0) & (pc.field("ymin") <= y1) & (pc.field("ymax") >= y0)
+    )
+    if cand.num_rows == 0:
+        return []
+    geoms = shapely.from_wkb(cand.column("geometry").to_numpy(zero_copy_only=False))
+    cand = cand.filter(pa.array(shapely.intersects(geoms, aoi)))
+
+    ranges = (
+        cand.group_by(["scene_id", "swath"])
+            .aggregate([("burst_index", "min"), ("burst_index", "max")])
+            .sort_by([("scene_id", "ascending"), ("swath", "ascending")])
+    )
+    return list(zip(*(ranges.column(c).to_pylist() for c in ["scene_id", "swath", "burst_index_min", "burst_index_max"])))
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+SQLite key index over the Sentinel-1 catalog for batched fileID / scene_id lookups without loading the dataset
+"""
+"""
+@Time    : 2026-10-17
+@Author  : Colm Keyes
+@Email   : keyesco@tcd.ie
+@File    : catalog_index.py
+"""
+
+import os
+import glob
+import sqlite3
+import threading
+
+import numpy as np
+
+import s1_catalog as cat
+
+INDEX_NAME = "_scene_index.sqlite"     # leading "_" keeps it out of pyarrow dataset discovery
+
+# catalog columns mirrored into the index; vector columns are stored as 24-byte float64 blobs
+INDEX_COLUMNS = [
+    "fileID", "scene_id", "download_url", "startTime", "track", "orbitDirection", "geometry",
+    "pre_position", "pre_position_time", "post_position", "post_position_time",
+    "pre_velocity", "post_velocity", "ascending_node_time", "fileName", "bytes", "md5sum",
+]
+VECTOR_COLUMNS = {"pre_position", "post_position", "pre_velocity", "post_velocity"}
+
+SQL_CHUNK = 500    # keys per IN (...) query, well under SQLite's host-parameter limit
+
+
+def catalog_signature(catalog_dir: str) -> str:
+    """
+    Cheap fingerprint of the catalog's part files (path, size, mtime) used to detect a stale index.
+    """
+    files = sorted(glob.glob(os.path.join(catalog_dir, "year=*", "month=*", "*.parquet")))
+    return "|".join(f"{os.path.relpath(f, catalog_dir)}:{os.path.getsize(f)}:{int(os.path.getmtime(f))}" for f in files)
+
+
+class CatalogIndex:
+    """
+    B-tree index keyed by fileID (primary key) and scene_id, answering batched lookups of
+    URL, startTime, track, geometry and state vectors in O(log n) per key.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): SQLite file; created if it does not exist.
+        """
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        cols = ", ".join(f"{c} {self._sql_type(c)}" for c in INDEX_COLUMNS)
+        existing = [r[1] for r in self.conn.execute("PRAGMA table_info(scenes)")]
+        if existing and existing != INDEX_COLUMNS:
+            # index written by an older layout: drop it so open_index rebuilds it
+            self.conn.executescript("DROP TABLE scenes; DROP TABLE IF EXISTS meta;")
+        self.conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS scenes ({cols}) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS scenes_scene_id ON scenes (scene_id);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+
+    @staticmethod
+    def _sql_type(column: str) -> str:
+        if column == "fileID":
+            return "TEXT PRIMARY KEY"
+        if column in ("track", "bytes"):
+            return "INTEGER"
+        if column in VECTOR_COLUMNS or column == "geometry":
+            return "BLOB"
+        return "TEXT"
+
+    def signature(self) -> str:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'signature'").fetchone()
+        return row[0] if row else None
+
+    def build(self, catalog_dir: str, batch_rows: int = 50_000) -> int:
+        """
+        (Re)load the index from the catalog, streaming record batches rather than the whole table.
+        """
+        dataset = cat.open_catalog(catalog_dir)
+        placeholders = ",".join("?" * len(INDEX_COLUMNS))
+        n = 0
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM scenes")
+            for batch in dataset.to_batches(columns=INDEX_COLUMNS, batch_size=batch_rows):
+                cols = []
+                for name in INDEX_COLUMNS:
+                    if name in VECTOR_COLUMNS:
+                        vec = cat.vectors_to_numpy(batch.column(name))
+                        cols.append([None if np.isnan(v[0]) else v.tobytes() for v in vec])
+                    else:
+                        cols.append(batch.column(name).to_pylist())
+                # INSERT OR REPLACE: if the catalog still holds duplicate fileIDs, the last one wins
+                self.conn.executemany(f"INSERT OR REPLACE INTO scenes VALUES ({placeholders})", zip(*cols))
+                n += batch.num_rows
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('signature', ?)", (catalog_signature(catalog_dir),)
+            )
+        return n
+
+    def lookup(self, keys, columns: list = None, by: str = "fileID") -> dict:
+        """
+        Batched lookup of catalog rows.
+
+        Args:
+            keys (iterable): fileIDs (or scene_ids with by="scene_id").
+            columns (list): columns to return; all index columns if None.
+            by (str): "fileID" or "scene_id".
+
+        Returns:
+            dict: key -> {column: value}; vector columns come back as float64 arrays of shape (3,).
+                  Keys not in the catalog are absent.
+        """
+        if by not in ("fileID", "scene_id"):
+            raise ValueError("by must be 'fileID' or 'scene_id'")
+        columns = list(columns or INDEX_COLUMNS)
+        keys = list(dict.fromkeys(keys))
+        out = {}
+        with self._lock:
+            for i in range(0, len(keys), SQL_CHUNK):
+                chunk = keys[i:i + SQL_CHUNK]
+                rows = self.conn.execute(
+                    f"SELECT {by}, {', '.join(columns)} FROM scenes "
+                    f"WHERE {by} IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for key, *values in rows:
+                    out[key] = {
+                        c: (np.frombuffer(v, dtype=float) if c in VECTOR_COLUMNS and v is not None else v)
+                        for c, v in zip(columns, values)
+                    }
+        return out
+
+    def scene_vectors(self, file_ids) -> dict:
+        """
+        fileID -> {"startTime": str, "prePosition": np.ndarray(3)} for scenes with captured
+        state vectors; scenes catalogued before they were captured are omitted.
+        """
+        rows = self.lookup(file_ids, ["startTime", "pre_position"])
+        return {
+            fid: {"startTime": r["startTime"], "prePosition": r["pre_position"]}
+            for fid, r in rows.items() if r["pre_position"] is not None
+        }
+
+    def close(self):
+        self.conn.close()
+
+
+def open_index(catalog_dir: str, path: str = None, rebuild: bool = None) -> CatalogIndex:
+    """
+    Open the index next to the catalog, (re)building it when the catalog's part files have changed.
+
+    Args:
+        catalog_dir (str): year/month catalog.
+        path (str): index file; defaults to <catalog_dir>/_scene_index.sqlite.
+        rebuild (bool): force (True) or skip (False) the rebuild; by default only when stale.
+    """
+    index = CatalogIndex(path or os.path.join(catalog_dir, INDEX_NAME))
+    if rebuild or (rebuild is None and index.signature() != catalog_signature(catalog_dir)):
+        n = index.build(catalog_dir)
+        print(f"Indexed {n} catalog rows into {index.path}")
+    return index
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Splits an ASF catalog search into month x sub-bbox queries, runs them concurrently and records which are done
+"""
+"""
+@Time    : 2026-10-17
+@Author  : Colm Keyes
+@Email   : keyesco@tcd.ie
+@File    : catalog_search.py
+"""
+
+import os
+import json
+import math
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+
+
+SubQuery = namedtuple("SubQuery", ["key", "bbox", "start", "end"])
+
+
+def month_ranges(start_date: str, end_date: str):
+    """
+    Split [start_date, end_date] (YYYY-MM-DD, inclusive) into per-calendar-month (start, end) ranges.
+    """
+    start = date.fromisoformat(start_date)
+    end   = date.fromisoformat(end_date)
+    ranges = []
+    while start <= end:
+        nxt = (start.replace(day=1) + timedelta(days=32)).replace(day=1)
+        ranges.append((start.isoformat(), min(nxt - timedelta(days=1), end).isoformat()))
+        start = nxt
+    return ranges
+
+
+def tile_bbox(bbox: tuple, tile_deg: float):
+    """
+    Split a WGS84 bbox into a grid of sub-bboxes no larger than tile_deg on a side.
+    """
+    x0, y0, x1, y1 = bbox
+    nx = max(1, math.ceil((x1 - x0) / tile_deg))
+    ny = max(1, math.ceil((y1 - y0) / tile_deg))
+    dx, dy = (x1 - x0) / nx, (y1 - y0) / ny
+    return [
+        (round(x0 + i * dx, 6), round(y0 + j * dy, 6), round(x0 + (i + 1) * dx, 6), round(y0 + (j + 1) * dy, 6))
+        for j in range(ny) for i in range(nx)
+    ]
+
+
+def plan_subqueries(bbox: tuple, start_date: str, end_date: str, tile_deg: float = 6.0):
+    """
+    Build the month x sub-bbox search plan, ordered by month so partitions complete in turn.
+    """
+    plan = []
+    for m_start, m_end in month_ranges(start_date, end_date):
+        for tile in tile_bbox(bbox, tile_deg):
+            key = f"{m_start}_{m_end}_" + "_".join(f"{c:g}" for c in tile)
+            plan.append(SubQuery(key, tile, m_start, m_end))
+    return plan
+
+
+class SearchManifest:
+    """
+    JSON record of finished sub-queries, kept next to the catalog so an interrupted
+    run only repeats the sub-queries that never completed.
+
+    Sub-queries whose range reaches into the last few days are never marked done; the date
+    they were last searched is kept under "searched" instead, so the next run can restart
+    them from the newest catalogued scene rather than from the start of their month.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): manifest file; starts with "_" so pyarrow dataset discovery ignores it.
+        """
+        self.path = path
+        self.done = set()
+        self.searched = {}
+        self.exists = os.path.exists(path)
+        self._lock = threading.Lock()
+        if self.exists:
+            with open(path) as f:
+                state = json.load(f)
+            self.done = set(state.get("done", []))
+            self.searched = state.get("searched", {})
+
+    def pending(self, plan):
+        return [q for q in plan if q.key not in self.done]
+
+    def _save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"done": sorted(self.done), "searched": self.searched, "updated": datetime.utcnow().isoformat()}, f)
+        os.replace(tmp, self.path)
+        self.exists = True
+
+    def adopt(self, plan, since: str):
+        """
+        Seed a missing manifest from a catalog built before it existed: sub-queries ending
+        before `since` count as done, the one spanning it as searched up to it.
+        """
+        with self._lock:
+            for q in plan:
+                if q.end < since:
+                    self.done.add(q.key)
+                elif q.start <= since:
+                    self.searched[q.key] = since
+            self._save()
+
+    def mark_done(self, query: SubQuery):
+        """
+        Record a sub-query as complete. Ranges that reach into the last few days are left open,
+        because ASF may still ingest acquisitions for them; only the date they were searched is kept.
+        """
+        with self._lock:
+            if date.fromisoformat(query.end) >= date.today() - timedelta(days=2):
+                self.searched[query.key] = date.today().isoformat()
+            else:
+                self.done.add(query.key)
+                self.searched.pop(query.key, None)
+            self._save()
+
+
+def resume_plan(plan, manifest: SearchManifest, latest: str = None, lookback_days: int = 2):
+    """
+    Sub-queries still to run: every one the manifest has not marked done, over its full range,
+    so months that failed or were interrupted are searched again whatever the catalog holds.
+
+    Only a sub-query that already completed once (see SearchManifest.searched) is narrowed: it
+    restarts `lookback_days` before the earlier of its last search and the newest catalogued
+    startTime (`latest`, YYYY-MM-DD...), to catch scenes ASF ingests late.
+    """
+    todo = []
+    for q in manifest.pending(plan):
+        last = manifest.searched.get(q.key)
+        if last and latest:
+            since = date.fromisoformat(min(last, latest[:10])) - timedelta(days=lookback_days)
+            q = q._replace(start=min(max(since.isoformat(), q.start), q.end))
+        todo.append(q)
+    return todo
+
+
+class SubQueryError(RuntimeError):
+    """
+    One or more sub-queries failed; `failed` holds (query, exception) pairs.
+    """
+
+    def __init__(self, failed):
+        self.failed = failed
+        super().__init__(f"{len(failed)} sub-queries failed: " + ", ".join(q.key for q, _ in failed))
+
+
+def run_subqueries(plan, search_fn, workers: int = 4):
+    """
+    Run search_fn(query) on a bounded thread pool, yielding (query, result) as each finishes.
+
+    A failed sub-query is reported as it happens and the others carry on; once every
+    successful one has been yielded, the failures are raised together as SubQueryError.
+    Failed sub-queries are never marked done, so the next run retries them.
+    """
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(search_fn, q): q for q in plan}
+        for fut in as_completed(futures):
+            q = futures[fut]
+            try:
+                result = fut.result()
+            except Exception as e:
+                print(f"  ❌ Sub-query {q.key} failed: {e}")
+                failed.append((q, e))
+                continue
+            yield q, result
+    if failed:
+        raise SubQueryError(failed)
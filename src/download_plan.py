@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Plans SLC downloads: one entry per distinct scene, skipping archives already on disk that match the catalog
+"""
+"""
+@Time    : 2026-10-17
+@Author  : Colm Keyes
+@Email   : keyesco@tcd.ie
+@File    : download_plan.py
+"""
+
+import os
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+HASH_CHUNK = 8 * 1024 * 1024
+
+# archive states; only MISSING and CORRUPT are downloaded
+OK      = "ok"         # on disk, size (and md5 if checked) match the catalog
+PRESENT = "present"    # on disk, but the catalog has no size to check it against
+MISSING = "missing"
+CORRUPT = "corrupt"    # on disk with the wrong size or checksum (e.g. a truncated download)
+
+
+def unique_scenes(pairs: pd.DataFrame) -> list:
+    """
+    Distinct fileIDs of a pair table, in first-appearance order (each pair's master, then slave).
+    """
+    both = pd.DataFrame({"m": pairs["master_fileID"].astype(str), "s": pairs["slave_fileID"].astype(str)})
+    return list(dict.fromkeys(both.to_numpy().ravel()))
+
+
+def file_md5(path: str) -> str:
+    h = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def archive_status(path: str, size: int = None, md5: str = None, verify_md5: bool = False) -> str:
+    """
+    State of one archive against its catalog size / md5sum.
+    """
+    if not os.path.exists(path):
+        return MISSING
+    if size is None or pd.isna(size):
+        return PRESENT
+    if os.path.getsize(path) != int(size):
+        return CORRUPT
+    if verify_md5 and md5 and file_md5(path) != md5:
+        return CORRUPT
+    return OK
+
+
+def plan_downloads(file_ids, meta: dict, out_dir: str, verify_md5: bool = False, workers: int = 4) -> pd.DataFrame:
+    """
+    Check every distinct scene against out_dir.
+
+    Args:
+        file_ids (iterable): fileIDs to fetch; duplicates are planned once.
+        meta (dict): fileID -> {"download_url", "scene_id", "fileName", "bytes", "md5sum"}
+                     (catalog_index lookup); fileIDs absent from it are reported as unplannable.
+        out_dir (str): download directory.
+        verify_md5 (bool): also hash archives whose size matches (reads every file in full).
+        workers (int): archives checked concurrently (hashing is I/O bound).
+
+    Returns:
+        pd.DataFrame: fileID, url, path, bytes, md5sum, status - one row per catalogued scene.
+    """
+    ids = list(dict.fromkeys(file_ids))
+    unknown = [fid for fid in ids if fid not in meta or not meta[fid].get("download_url")]
+    for fid in unknown:
+        print(f"  ❌ {fid}: not in the catalog, cannot plan its download")
+
+    rows = []
+    for fid in ids:
+        if fid in unknown:
+            continue
+        m = meta[fid]
+        name = m.get("fileName") or f"{m.get('scene_id') or fid.removesuffix('-SLC')}.zip"
+        rows.append({
+            "fileID":  fid,
+            "url":     m["download_url"],
+            "path":    os.path.join(out_dir, name),
+            "bytes":   m.get("bytes"),
+            "md5sum":  m.get("md5sum"),
+        })
+    plan = pd.DataFrame(rows, columns=["fileID", "url", "path", "bytes", "md5sum"])
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        plan["status"] = list(pool.map(
+            lambda r: archive_status(r.path, r.bytes, r.md5sum, verify_md5), plan.itertuples(index=False)
+        ))
+    return plan
+
+
+def to_download(plan: pd.DataFrame) -> pd.DataFrame:
+    return plan[plan["status"].isin([MISSING, CORRUPT])]
+
+
+def summarize(plan: pd.DataFrame, requested: int) -> str:
+    """
+    One-line summary: queue size before / after planning and the bytes not re-downloaded.
+
+    Args:
+        requested (int): scene slots in the pair table (2 per pair), i.e. the naive queue length.
+    """
+    size = pd.to_numeric(plan["bytes"], errors="coerce")
+    mean = size.mean() if size.notna().any() else 0.0
+    counts = plan["status"].value_counts()
+    skipped = plan["status"].isin([OK, PRESENT])
+    # duplicates are priced at the mean scene size, skipped archives at their own size
+    saved = (requested - len(plan)) * mean + size[skipped].fillna(mean).sum()
+    todo  = size[~skipped].fillna(mean).sum()
+    return (
+        f"{requested} scene slots -> {len(plan)} distinct scenes: "
+        f"{counts.get(OK, 0)} ok, {counts.get(PRESENT, 0)} present (unverified), "
+        f"{counts.get(CORRUPT, 0)} corrupt, {counts.get(MISSING, 0)} missing; "
+        f"downloading {todo / 1e9:.1f} GB, {saved / 1e9:.1f} GB saved"
+    )
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+Pair-ordered download scheduling and a "pair ready" queue that lets SNAP processing start while downloads continue
+"""
+"""
+@Time    : 2026-10-17
+@Author  : Colm Keyes
+@Email   : keyesco@tcd.ie
+@File    : pair_schedule.py
+"""
+
+import os
+import json
+import time
+import uuid
+
+import pandas as pd
+
+READY_NAME   = "pairs_ready.jsonl"
+START_EVENT  = "start"
+DONE_EVENT   = "done"
+IDLE_TIMEOUT = 6 * 3600   # seconds a follower waits for a new event before giving up
+
+
+def _pair_keys(pairs: pd.DataFrame) -> list:
+    return list(zip(pairs["master_fileID"].astype(str), pairs["slave_fileID"].astype(str)))
+
+
+def pair_order(pairs: pd.DataFrame, have: set) -> list:
+    """
+    Order in which to fetch the scenes missing from `have` so that complete pairs appear as early as possible.
+
+    Greedy: always schedule the pair needing the fewest scenes not yet on disk or queued
+    (ties in pair-table order), so a scene shared by many pairs (e.g. a common master)
+    completes each of them with a single further download.
+
+    Args:
+        pairs (pd.DataFrame): pair table with master_fileID / slave_fileID.
+        have (set): fileIDs already on disk.
+
+    Returns:
+        list: fileIDs to download, in order.
+    """
+    keys = _pair_keys(pairs)
+    need, users = {}, {}
+    for i, (m, s) in enumerate(keys):
+        need[i] = {m, s} - have
+        for fid in need[i]:
+            users.setdefault(fid, []).append(i)
+
+    # buckets of pairs by the number of scenes they still need (0, 1 or 2); dicts keep table order
+    buckets = {1: {}, 2: {}}
+    for i, n in need.items():
+        if n:
+            buckets[len(n)][i] = None
+
+    order = []
+    while buckets[1] or buckets[2]:
+        i = next(iter(buckets[1] or buckets[2]))
+        for fid in sorted(need[i], key=lambda f: f != keys[i][0]):   # master first
+            order.append(fid)
+            for j in users.pop(fid):
+                buckets[len(need[j])].pop(j)
+                need[j].discard(fid)
+                if need[j]:
+                    buckets[len(need[j])][j] = None
+    return order
+
+
+class PairReadyQueue:
+    """
+    Writer side of the "pair ready" queue: a JSONL file starting with a "start" event that
+    carries this run's id, then one event per pair whose two scenes are both on disk, appended
+    as downloads complete, then a final "done" event for the run.
+
+    The file is replaced on open, so a rerun announces again every pair already on disk;
+    followers notice the new run id and start reading the new file from its beginning.
+    """
+
+    def __init__(self, path: str, pairs: pd.DataFrame, have: set):
+        self.path  = path
+        self.pairs = pairs.reset_index(drop=True)
+        self.have  = set()
+        self.users = {}
+        for i, key in enumerate(_pair_keys(self.pairs)):
+            for fid in set(key):
+                self.users.setdefault(fid, set()).add(i)
+        self.waiting = {fid: set(users) for fid, users in self.users.items()}
+        self.need = {i: set(key) for i, key in enumerate(_pair_keys(self.pairs))}
+        self.ready = 0
+        self.run   = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        # swap in a file holding only the header, so a follower never sees it empty or half written
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(json.dumps({"event": START_EVENT, "run": self.run, "pairs": len(self.pairs), "time": time.time()}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        self.completed(have)
+
+    def _emit(self, event: dict):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(event) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def completed(self, file_ids) -> int:
+        """
+        Record scenes now on disk and emit an event for each pair they complete.
+
+        Returns:
+            int: number of pairs that became ready.
+        """
+        before = self.ready
+        for fid in file_ids:
+            if fid in self.have:
+                continue
+            self.have.add(fid)
+            for i in sorted(self.waiting.pop(fid, ())):
+                self.need[i].discard(fid)
+                if not self.need[i]:
+                    row = self.pairs.iloc[i]
+                    self._emit({
+                        "event":         "ready",
+                        "master_fileID": str(row["master_fileID"]),
+                        "slave_fileID":  str(row["slave_fileID"]),
+                        "time":          time.time(),
+                    })
+                    self.ready += 1
+        return self.ready - before
+
+    def evicted(self, file_ids):
+        """
+        Scenes removed from disk again (e.g. by SLCStore under its budget): pairs not yet
+        announced wait for them once more.
+        """
+        for fid in file_ids:
+            if fid not in self.have:
+                continue
+            self.have.discard(fid)
+            for i in self.users.get(fid, ()):
+                if self.need[i]:
+                    self.need[i].add(fid)
+                    self.waiting.setdefault(fid, set()).add(i)
+
+    def close(self):
+        """
+        Tell consumers no further pairs will become ready in this run.
+        """
+        self._emit({"event": DONE_EVENT, "run": self.run, "ready": self.ready, "pairs": len(self.pairs), "time": time.time()})
+
+
+def _read_header(f):
+    """
+    The queue's "start" event from an open queue file, or None while its first line is
+    incomplete. A file without one (written before run ids existed) counts as run None.
+    """
+    line = f.readline()
+    if not line.endswith(b"\n"):
+        return None
+    event = json.loads(line)
+    return event if event["event"] == START_EVENT else {"event": START_EVENT, "run": None, "time": 0.0}
+
+
+def follow_ready(path: str, pairs: pd.DataFrame, poll: float = 30.0, idle_timeout: float = IDLE_TIMEOUT,
+                 since: float = None):
+    """
+    Reader side: yield (index, row) of `pairs` as their "pair ready" events arrive, like iterrows().
+
+    Tails the queue file (waiting for it to appear) until the "done" event of the run being
+    followed, or until nothing new has arrived for idle_timeout seconds (None waits forever).
+    When the downloader restarts, the file is replaced by one with a new run id in its
+    header (or a file shorter than what was already read); the follower then reads the new
+    file from its beginning. With `since` (a time.time() value), a run started before it is
+    treated as left over from an earlier session: its pairs are still yielded, but its "done"
+    event is ignored and the follower waits for the next run. Pairs not in `pairs` are
+    ignored and each pair is yielded once.
+    """
+    index = {key: i for i, key in reversed(list(enumerate(_pair_keys(pairs))))}
+    seen, offset, idle = set(), 0, 0.0
+    run, stale = (), False    # () until a header has been read; run None is a header-less file
+    while True:
+        lines = []
+        if os.path.exists(path):
+            # header and events come from one open file, so a replacement between polls is seen whole
+            with open(path, "rb") as f:
+                header = _read_header(f)
+                if header is not None and header["run"] != run:
+                    if run != ():
+                        print(f"↻ Pair-ready queue restarted (run {header['run']}); reading it from the start")
+                    run, offset = header["run"], 0
+                    stale = since is not None and header["time"] < since
+                elif header is not None and os.fstat(f.fileno()).st_size < offset:
+                    print("↻ Pair-ready queue was truncated; reading it from the start")
+                    offset = 0
+                if header is not None:
+                    f.seek(offset)
+                    chunk = f.read()
+                    # only consume whole lines; a partly written event is picked up on the next poll
+                    complete = chunk[:chunk.rfind(b"\n") + 1]
+                    offset += len(complete)
+                    lines = complete.decode().splitlines()
+        for line in lines:
+            event = json.loads(line)
+            if event["event"] == START_EVENT:
+                continue
+            if event["event"] == DONE_EVENT:
+                if not stale and event.get("run") == run:
+                    return
+                continue
+            i = index.get((event["master_fileID"], event["slave_fileID"]))
+            if i is not None and i not in seen:
+                seen.add(i)
+                yield pairs.index[i], pairs.iloc[i]
+        if lines:
+            idle = 0.0
+            continue
+        if idle_timeout is not None and idle >= idle_timeout:
+            print(f"❌ No pair became ready in {idle_timeout:.0f}s; stopping")
+            return
+        time.sleep(poll)
+        idle += poll
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorised reference/secondary candidate enumeration and per-track pair selection for Sentinel-1
+"""
+"""
+@Time    : 2026-10-17
+@Author  : Colm Keyes
+@Email   : keyesco@tcd.ie
+@File    : pair_selection.py
+"""
+
+import numpy as np
+import pandas as pd
+import shapely
+
+import baselines
+from baselines import DAY_NS
+
+
+def enumerate_candidates(times_ns: np.ndarray, min_days: int, k: int = 1, max_days: int = None):
+    """
+    Find secondary candidates for every reference on one track with numpy.searchsorted.
+
+    Args:
+        times_ns (np.ndarray): sorted acquisition times, int64 nanoseconds.
+        min_days (int): minimum temporal baseline in whole days.
+        k (int): secondaries per reference, nearest-in-time first; None keeps every secondary
+                 up to max_days (the max-gap variant).
+        max_days (int): maximum temporal baseline in whole days; None for no limit.
+
+    Returns:
+        (ref_idx, sec_idx, delta_days) int64 arrays; delta_days are whole days, truncated like
+        timedelta.days.
+    """
+    t = np.asarray(times_ns, dtype=np.int64)
+    n = len(t)
+    if k is None and max_days is None:
+        raise ValueError("k=None (all secondaries) needs max_days")
+
+    # first secondary at least min_days later; the last one within max_days
+    first = np.searchsorted(t, t + min_days * DAY_NS, side="left")
+    last  = np.searchsorted(t, t + (max_days + 1) * DAY_NS, side="left") if max_days is not None else np.full(n, n)
+    if k is not None:
+        last = np.minimum(last, first + k)
+
+    counts = np.maximum(last - first, 0)
+    ref = np.repeat(np.arange(n), counts)
+    # offset of each candidate within its reference's run: 0, 1, ..., counts[i]-1
+    offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    sec = first[ref] + offset
+    delta_days = (t[sec] - t[ref]) // DAY_NS
+    return ref, sec, delta_days
+
+
+def overlap_candidates(times_ns: np.ndarray, geoms: np.ndarray, min_days: int, k: int = 1,
+                       max_days: int = None, min_overlap: float = 0.5):
+    """
+    Secondary candidates restricted to footprints that overlap the reference, via one STRtree per track.
+
+    All intersecting (reference, secondary) footprint pairs come from a single bulk tree query;
+    their overlap is then computed in one vectorised intersection, and the time window and
+    k-nearest rule of enumerate_candidates are applied to the pairs that pass.
+
+    Args:
+        times_ns (np.ndarray): sorted acquisition times, int64 nanoseconds.
+        geoms (np.ndarray): shapely footprints row-aligned with times_ns (None where unknown;
+                            such scenes get no pairs).
+        min_overlap (float): minimum intersection area as a fraction of the reference footprint.
+
+    Returns:
+        (ref_idx, sec_idx, delta_days, overlap) arrays, ordered by reference then time.
+    """
+    t = np.asarray(times_ns, dtype=np.int64)
+    geoms = np.asarray(geoms, dtype=object)
+    ref, sec = shapely.STRtree(geoms).query(geoms, predicate="intersects")
+
+    dt = t[sec] - t[ref]
+    keep = dt >= min_days * DAY_NS
+    if max_days is not None:
+        keep &= dt < (max_days + 1) * DAY_NS
+    ref, sec = ref[keep], sec[keep]
+
+    # overlap as a fraction of the reference footprint (degree areas; frames are small enough)
+    overlap = shapely.area(shapely.intersection(geoms[ref], geoms[sec])) / shapely.area(geoms[ref])
+    keep = overlap >= min_overlap
+    ref, sec, overlap = ref[keep], sec[keep], overlap[keep]
+
+    # rows are time-sorted, so sorting by (ref, sec) puts each reference's nearest secondaries first
+    order = np.lexsort((sec, ref))
+    ref, sec, overlap = ref[order], sec[order], overlap[order]
+    if k is not None and len(ref):
+        starts = np.flatnonzero(np.r_[True, ref[1:] != ref[:-1]])
+        rank = np.arange(len(ref)) - np.repeat(starts, np.diff(np.r_[starts, len(ref)]))
+        keep = rank < k
+        ref, sec, overlap = ref[keep], sec[keep], overlap[keep]
+
+    return ref, sec, (t[sec] - t[ref]) // DAY_NS, overlap
+
+
+def candidate_table(track_df: pd.DataFrame, min_days: int, k: int = 1, max_days: int = None,
+                    min_overlap: float = None) -> pd.DataFrame:
+    """
+    Candidate pairs for one track as a DataFrame.
+
+    Args:
+        track_df (pd.DataFrame): scenes on one track sorted by startTime, with fileID and startTime
+                                 columns (and WKB geometry when min_overlap is set).
+        min_overlap (float): if set, only footprint-overlapping pairs (see overlap_candidates).
+
+    Returns:
+        pd.DataFrame: ref_idx, sec_idx (row positions in track_df), Reference, Secondary, delta_days
+                      (, overlap).
+    """
+    times = pd.to_datetime(track_df["startTime"], utc=True).dt.as_unit("ns").astype("int64").to_numpy()
+    extra = {}
+    if min_overlap is None:
+        ref, sec, delta = enumerate_candidates(times, min_days, k, max_days)
+    else:
+        geoms = shapely.from_wkb(track_df["geometry"].to_numpy())
+        ref, sec, delta, extra["overlap"] = overlap_candidates(times, geoms, min_days, k, max_days, min_overlap)
+    file_ids = track_df["fileID"].to_numpy()
+    return pd.DataFrame({
+        "ref_idx":    ref,
+        "sec_idx":    sec,
+        "Reference":  file_ids[ref],
+        "Secondary":  file_ids[sec],
+        "delta_days": delta,
+        **extra,
+    })
+
+
+def select_track_pairs(task: dict):
+    """
+    Candidate enumeration and baseline filtering for one track; a top-level function so it
+    can run in a process pool.
+
+    Args:
+        task (dict): track, grp (startTime-ordered scenes with fileID, startTime, pre_position
+                     and geometry if min_overlap is set), min_days, k, max_days, min_overlap, max_perp,
+                     and optionally key, returned as given to identify the group (default: track).
+
+    Returns:
+        (key, pairs, pending): pairs resolved from catalog state vectors with perp_baseline <= max_perp,
+        and candidate rows with a scene lacking vectors, carrying ref_pos / sec_pos (None where
+        missing) for the caller to complete from ASF metadata.
+    """
+    grp = task["grp"]
+    cand = candidate_table(grp, task["min_days"], task["k"], task["max_days"], task["min_overlap"])
+    ref, sec = cand["ref_idx"].to_numpy(), cand["sec_idx"].to_numpy()
+
+    vectors = grp["pre_position"].to_numpy()
+    pos = baselines.stack_positions(vectors)
+    temp, perp = baselines.pair_baselines(baselines.to_ns(grp["startTime"]), pos, ref, sec)
+    cand["temp_baseline"] = temp
+    cand["perp_baseline"] = perp
+    cand["track"]         = task["track"]
+    times = grp["startTime"].to_numpy()
+    cand["master_time"]   = times[ref]
+    cand["slave_time"]    = times[sec]
+
+    unresolved = np.isnan(perp)
+    pending = cand[unresolved].assign(ref_pos=vectors[ref[unresolved]], sec_pos=vectors[sec[unresolved]])
+    return task.get("key", task["track"]), cand[~unresolved & (perp <= task["max_perp"])], pending
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Typed Parquet pair-table format shared by pair selection, baselines, download and SNAP processing
+"""
+"""
+@Time    : 2026-10-17
+@Author  : Colm Keyes
+@Email   : keyesco@tcd.ie
+@File    : pair_table.py
+"""
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+_ID   = pa.dictionary(pa.int32(), pa.string())   # fileIDs / scene_ids repeat across pairs
+_TIME = pa.timestamp("us", tz="UTC")
+
+PAIR_SCHEMA = pa.schema([
+    ("master_fileID",        _ID),
+    ("slave_fileID",         _ID),
+    ("master_id",            _ID),      # scene_id (SAFE zip stem)
+    ("slave_id",             _ID),
+    ("master_time",          _TIME),
+    ("slave_time",           _TIME),
+    ("track",                pa.int32()),
+    ("delta_days",           pa.int32()),
+    ("temp_baseline",        pa.int32()),
+    ("perp_baseline",        pa.float64()),
+    ("perp_baseline_signed", pa.float64()),
+    ("baseline_method",      pa.dictionary(pa.int8(), pa.string())),   # how perp_baseline was measured
+    ("overlap",              pa.float64()),
+])
+
+# baseline_method values: the two perp_baseline measures differ in scale, so filter each with its own threshold
+STATE_VECTOR_DISTANCE = "state_vector_distance"   # distance between the scenes' ASF prePosition vectors
+ZERO_DOPPLER          = "zero_doppler"            # geometric Bperp at zero-Doppler from the SLC orbits (magnitude)
+
+# earlier stage outputs used Reference / Secondary for the pair's fileIDs
+LEGACY_NAMES = {"Reference": "master_fileID", "Secondary": "slave_fileID"}
+
+
+def normalise(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rename legacy columns and derive scene_ids (fileID less "-SLC") where they are missing.
+    """
+    df = df.rename(columns=LEGACY_NAMES)
+    for role in ("master", "slave"):
+        fid, sid = f"{role}_fileID", f"{role}_id"
+        if fid in df.columns and sid not in df.columns:
+            df[sid] = df[fid].astype(str).str.replace(r"-SLC$", "", regex=True)
+    return df
+
+
+def to_table(df: pd.DataFrame) -> pa.Table:
+    """
+    Cast a pair DataFrame to PAIR_SCHEMA; schema columns it lacks are written as nulls and
+    columns outside the schema are dropped.
+    """
+    df = normalise(df)
+    cols = {}
+    for field in PAIR_SCHEMA:
+        if field.name not in df.columns:
+            cols[field.name] = pa.nulls(len(df), field.type)
+            continue
+        values = df[field.name]
+        if pa.types.is_timestamp(field.type):
+            values = pd.to_datetime(values, utc=True)
+        elif pa.types.is_dictionary(field.type):
+            values = values.astype("string")
+        arr = pa.array(values, from_pandas=True)
+        cols[field.name] = arr.cast(field.type) if not pa.types.is_dictionary(field.type) else arr.dictionary_encode().cast(field.type)
+    return pa.table(cols, schema=PAIR_SCHEMA)
+
+
+def write_pairs(df: pd.DataFrame, path: str):
+    """
+    Write a pair table as Parquet; a .csv path writes the same typed columns as CSV for legacy readers.
+    """
+    table = to_table(df)
+    if path.endswith(".csv"):
+        table.to_pandas().to_csv(path, index=False)
+    else:
+        pq.write_table(table, path)
+
+
+def read_pairs(path: str, columns: list = None) -> pd.DataFrame:
+    """
+    Read a pair table (Parquet, or a legacy CSV from any stage) with PAIR_SCHEMA types.
+
+    fileIDs / scene_ids come back as pandas categoricals, baselines as float64, days and
+    track as nullable Int32 and times as UTC timestamps.
+    """
+    if path.endswith(".csv"):
+        table = to_table(pd.read_csv(path, dtype=str))
+        if columns is not None:
+            table = table.select(columns)
+    else:
+        table = pq.read_table(path, columns=columns)
+    return table.to_pandas(types_mapper={pa.int32(): pd.Int32Dtype()}.get)
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Append-only Parquet journal for checkpointing long pair-selection / baseline runs so they resume after a crash
+"""
+"""
+@Time    : 2026-10-17
+@Author  : Colm Keyes
+@Email   : keyesco@tcd.ie
+@File    : run_journal.py
+"""
+
+import os
+import glob
+import json
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+PARAMS_NAME = "_params.json"
+
+
+class RunJournal:
+    """
+    Directory of Parquet part files, one per checkpoint.
+
+    Each append writes a new part atomically (.tmp + rename), so a crash loses at most the
+    checkpoint in progress. A part may also record "done" keys in its metadata, for units of
+    work (e.g. tracks) that complete without producing rows.
+    """
+
+    def __init__(self, path: str, params: dict = None):
+        """
+        Args:
+            path (str): journal directory; created if missing.
+            params (dict): run parameters the journal is valid for; a journal written with
+                           different parameters is discarded rather than resumed.
+        """
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        params_path = os.path.join(path, PARAMS_NAME)
+        params = json.loads(json.dumps(params or {}, default=str))
+        if os.path.exists(params_path):
+            with open(params_path) as f:
+                if json.load(f) != params:
+                    print(f"Run parameters changed; discarding journal {path}")
+                    self.clear()
+        with open(params_path, "w") as f:
+            json.dump(params, f, indent=2)
+
+    def parts(self) -> list:
+        return sorted(glob.glob(os.path.join(self.path, "part-*.parquet")))
+
+    def append(self, df: pd.DataFrame, done: list = None):
+        """
+        Write df (possibly empty) as the next part, with optional done keys in its metadata.
+        """
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"done": json.dumps(done or []).encode()})
+        name = os.path.join(self.path, f"part-{len(self.parts()):06d}.parquet")
+        pq.write_table(table, name + ".tmp")
+        os.replace(name + ".tmp", name)
+
+    def done_keys(self) -> set:
+        """
+        Union of the done keys recorded by every part.
+        """
+        done = set()
+        for p in self.parts():
+            meta = pq.read_schema(p).metadata or {}
+            done.update(json.loads(meta.get(b"done", b"[]")))
+        return done
+
+    def read(self, columns: list = None) -> pd.DataFrame:
+        """
+        All journaled rows as one DataFrame (empty if nothing is journaled yet).
+        """
+        tables = [pq.read_table(p, columns=columns) for p in self.parts()]
+        tables = [t for t in tables if t.num_rows]
+        if not tables:
+            return pd.DataFrame(columns=columns)
+        return pa.concat_tables(tables, promote_options="default").to_pandas()
+
+    def clear(self):
+        for p in glob.glob(os.path.join(self.path, "part-*.parquet*")):
+            os.remove(p)
+
+    def remove(self):
+        """
+        Delete the journal once its output has been consolidated.
+        """
+        shutil.rmtree(self.path, ignore_errors=True)
@@ -0,0 +1,585 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers for the Hive-partitioned Sentinel-1 scene catalog written by bin/1_generate_s1_catalog.py
+"""
+"""
+@Time    : 2026-10-17
+@Author  : Colm Keyes
+@Email   : keyesco@tcd.ie
+@File    : s1_catalog.py
+"""
+
+import os
+import glob
+import json
+import shutil
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import shapely
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+
+# Column layout of every part file; year/month are also the Hive partition keys
+CATALOG_SCHEMA = pa.schema([
+    ("scene_id",       pa.string()),
+    ("fileID",         pa.string()),
+    ("download_url",   pa.string()),
+    ("startTime",      pa.string()),
+    ("orbit",          pa.int64()),
+    ("track",          pa.int64()),
+    ("orbitDirection", pa.string()),
+    ("geometry",       pa.binary()),     # WKB, EPSG:4326
+    ("xmin",           pa.float64()),    # footprint bounds, so spatial filters can use row-group statistics
+    ("ymin",           pa.float64()),
+    ("xmax",           pa.float64()),
+    ("ymax",           pa.float64()),
+    # ASF baseline metadata (ECEF metres, m/s), so pair selection and baselines need no product_search
+    ("pre_position",        pa.list_(pa.float64(), 3)),
+    ("pre_position_time",   pa.string()),
+    ("post_position",       pa.list_(pa.float64(), 3)),
+    ("post_position_time",  pa.string()),
+    ("pre_velocity",        pa.list_(pa.float64(), 3)),
+    ("post_velocity",       pa.list_(pa.float64(), 3)),
+    ("ascending_node_time", pa.string()),
+    # archive identity, so downloads can be checked against what is already on disk
+    ("fileName",       pa.string()),
+    ("bytes",          pa.int64()),
+    ("md5sum",         pa.string()),
+    ("year",           pa.string()),
+    ("month",          pa.string()),
+])
+
+# GeoParquet 1.0 file metadata; crs is omitted, which the spec defines as OGC:CRS84 (lon/lat WGS84)
+GEO_METADATA = {
+    "version": "1.0.0",
+    "primary_column": "geometry",
+    "columns": {
+        "geometry": {
+            "encoding": "WKB",
+            "geometry_types": ["Polygon"],
+            "edges": "planar",
+        }
+    },
+}
+CATALOG_SCHEMA = CATALOG_SCHEMA.with_metadata({b"geo": json.dumps(GEO_METADATA).encode()})
+
+# Rows are sorted by these keys before they reach the writer, so each row group covers a
+# narrow strip of one track and its xmin/ymin/xmax/ymax/startTime statistics stay tight
+SORT_KEYS = [
+    ("orbitDirection", "ascending"),
+    ("track",          "ascending"),
+    ("ymin",           "ascending"),
+    ("startTime",      "ascending"),
+]
+SORT_BUFFER_ROWS   = 65_536     # rows held and sorted at once by the streaming writer
+
+MIN_ROWS_PER_GROUP = 1_024      # rows buffered per partition before a row group is flushed
+MAX_ROWS_PER_GROUP = 4_096      # small groups so bbox/time predicates can skip most of a partition
+MAX_ROWS_PER_FILE  = 262_144
+
+
+def dataset_schema() -> pa.Schema:
+    """
+    Schema of the catalog as read back: the file columns plus the int32 Hive partition keys.
+    """
+    fields = [f for f in CATALOG_SCHEMA if f.name not in ("year", "month")]
+    return pa.schema(fields + [("year", pa.int32()), ("month", pa.int32())], metadata=CATALOG_SCHEMA.metadata)
+
+
+def open_catalog(catalog_dir: str) -> ds.Dataset:
+    """
+    Open the Hive-partitioned (year=YYYY/month=MM) catalog as a pyarrow dataset.
+
+    The schema is fixed rather than inferred from the first file, so part files written before
+    a column was added simply read back nulls for it.
+    """
+    return ds.dataset(catalog_dir, schema=dataset_schema(), format="parquet", partitioning="hive")
+
+
+def catalog_exists(catalog_dir: str) -> bool:
+    """
+    True if catalog_dir already holds at least one Parquet part file.
+    """
+    if not os.path.isdir(catalog_dir):
+        return False
+    for _, _, files in os.walk(catalog_dir):
+        if any(f.endswith(".parquet") for f in files):
+            return True
+    return False
+
+
+def load_catalog_state(catalog_dir: str):
+    """
+    Read only fileID/startTime from the existing catalog.
+
+    Returns:
+        partitions (pa.Table): one row per year/month partition with its max startTime and row count.
+        known_ids (set): every fileID already written to the catalog.
+    """
+    if not catalog_exists(catalog_dir):
+        return None, set()
+
+    tbl = open_catalog(catalog_dir).to_table(columns=["fileID", "startTime"])
+    # derive the partition keys from startTime so this works whatever directory flavour wrote the files
+    start = tbl.column("startTime")
+    tbl = tbl.append_column("year", pc.utf8_slice_codeunits(start, 0, 4))
+    tbl = tbl.append_column("month", pc.utf8_slice_codeunits(start, 5, 7))
+    partitions = (
+        tbl.group_by(["year", "month"])
+           .aggregate([("startTime", "max"), ("fileID", "count_distinct")])
+           .sort_by([("year", "ascending"), ("month", "ascending")])
+    )
+    known_ids = set(tbl.column("fileID").to_pylist())
+    return partitions, known_ids
+
+
+def incremental_window(partitions, start_date: str, end_date: str, lookback_days: int = 2):
+    """
+    Work out which part of [start_date, end_date] still needs to be searched.
+
+    The window starts `lookback_days` before the newest startTime already in the catalog, so
+    scenes ASF ingests a little late are still picked up; they are deduplicated on fileID afterwards.
+    Returns (start, end) as YYYY-MM-DD strings, or None if the catalog is already up to date.
+    """
+    if partitions is None or partitions.num_rows == 0:
+        return start_date, end_date
+
+    latest = pc.max(partitions.column("startTime_max")).as_py()
+    latest = datetime.fromisoformat(latest[:19])
+    if latest.strftime("%Y-%m-%d") >= end_date:
+        return None
+
+    start = max(latest - timedelta(days=lookback_days), datetime.fromisoformat(start_date))
+    return start.strftime("%Y-%m-%d"), end_date
+
+
+STATE_VECTOR_COLUMNS = [
+    "pre_position", "pre_position_time", "post_position", "post_position_time",
+    "pre_velocity", "post_velocity", "ascending_node_time",
+]
+
+
+def state_vector_fields(prod) -> dict:
+    """
+    Flatten an ASF product's `baseline` dict into the catalog's state-vector columns (None where absent).
+    """
+    baseline = getattr(prod, "baseline", None) or {}
+    sv  = baseline.get("stateVectors") or {}
+    pos = sv.get("positions") or {}
+    vel = sv.get("velocities") or {}
+    return {
+        "pre_position":        pos.get("prePosition"),
+        "pre_position_time":   pos.get("prePositionTime"),
+        "post_position":       pos.get("postPosition"),
+        "post_position_time":  pos.get("postPositionTime"),
+        "pre_velocity":        vel.get("preVelocity"),
+        "post_velocity":       vel.get("postVelocity"),
+        "ascending_node_time": baseline.get("ascendingNodeTime"),
+    }
+
+
+def vectors_to_numpy(column) -> np.ndarray:
+    """
+    Convert a fixed-size-list<float64, 3> column to an (n, 3) array, with NaN rows for nulls.
+    """
+    arr = column.combine_chunks() if isinstance(column, pa.ChunkedArray) else column
+    values = arr.values.slice(arr.offset * 3, len(arr) * 3).to_numpy(zero_copy_only=False)
+    out = np.array(values, dtype=float).reshape(-1, 3)
+    out[arr.is_null().to_numpy(zero_copy_only=False)] = np.nan
+    return out
+
+
+def products_to_batch(products) -> pa.RecordBatch:
+    """
+    Convert one page of ASF search results into a catalog record batch.
+
+    Columns are built directly from the product properties; footprints are parsed and
+    WKB-encoded in one vectorised shapely call rather than per row.
+    """
+    props = [prod.properties for prod in products]
+    vectors = [state_vector_fields(prod) for prod in products]
+    geojson = [prod.geojson() if callable(prod.geojson) else prod.geojson for prod in products]
+
+    start = [p["startTime"] for p in props]
+    geoms = shapely.from_geojson(np.array([json.dumps(g["geometry"]) for g in geojson], dtype=object))
+    bounds = shapely.bounds(geoms)
+
+    return pa.RecordBatch.from_arrays([
+        pa.array([p["sceneName"] for p in props], pa.string()),
+        pa.array([p["fileID"] for p in props], pa.string()),
+        pa.array([p["url"] for p in props], pa.string()),
+        pa.array(start, pa.string()),
+        pa.array([p["orbit"] for p in props], pa.int64()),
+        pa.array([p["pathNumber"] for p in props], pa.int64()),
+        pa.array([p["flightDirection"] for p in props], pa.string()),
+        pa.array(shapely.to_wkb(geoms), pa.binary()),
+        pa.array(bounds[:, 0], pa.float64()),
+        pa.array(bounds[:, 1], pa.float64()),
+        pa.array(bounds[:, 2], pa.float64()),
+        pa.array(bounds[:, 3], pa.float64()),
+        *[pa.array([v[name] for v in vectors], CATALOG_SCHEMA.field(name).type) for name in STATE_VECTOR_COLUMNS],
+        pa.array([p.get("fileName") for p in props], pa.string()),
+        pa.array([int(p["bytes"]) if p.get("bytes") is not None else None for p in props], pa.int64()),
+        pa.array([p.get("md5sum") for p in props], pa.string()),
+        pa.array([t[:4] for t in start], pa.string()),
+        pa.array([t[5:7] for t in start], pa.string()),
+    ], schema=CATALOG_SCHEMA)
+
+
+def drop_seen(batch: pa.RecordBatch, seen: set) -> pa.RecordBatch:
+    """
+    Remove rows whose fileID is in `seen` (already catalogued, or earlier in this run) and add the rest to it.
+
+    Within the batch only each fileID's first row is kept.
+    """
+    ids  = batch.column("fileID")
+    uniq = pc.unique(ids).to_pylist()
+    # index_in against the column itself gives every row the position of its fileID's first row
+    first = pc.equal(pc.index_in(ids, value_set=ids), pa.array(np.arange(batch.num_rows)))
+    known = pc.is_in(ids, value_set=pa.array(list(seen.intersection(uniq)), pa.string()))
+    seen.update(uniq)
+    return batch.filter(pc.and_(first, pc.invert(known)))
+
+
+def sort_for_layout(table: pa.Table) -> pa.Table:
+    """
+    Sort rows by SORT_KEYS so row-group min/max statistics cluster by track and footprint.
+    """
+    return table.sort_by(SORT_KEYS)
+
+
+def stream_batches(pages, seen: set, stats: dict = None, buffer_rows: int = SORT_BUFFER_ROWS, lock=None):
+    """
+    Yield sorted record batches built from ASF result pages, skipping fileIDs in `seen`.
+
+    At most `buffer_rows` rows are held in memory: pages are accumulated up to that size,
+    sorted by SORT_KEYS and handed on. If `stats` is given, the number of pages and new
+    scenes, and the (orbitDirection, track) keys they touched, are accumulated into it.
+    Streams running on several threads over one `seen` set (and `stats`) pass a shared `lock`.
+    """
+    pending, n_pending = [], 0
+    for page in pages:
+        if not page:
+            continue
+        batch = products_to_batch(page)
+        with lock or nullcontext():
+            batch = drop_seen(batch, seen)
+            if stats is not None:
+                stats["pages"] = stats.get("pages", 0) + 1
+                stats["scenes"] = stats.get("scenes", 0) + batch.num_rows
+                stats.setdefault("tracks", set()).update(zip(
+                    batch.column("orbitDirection").to_pylist(), batch.column("track").to_pylist()
+                ))
+        if not batch.num_rows:
+            continue
+        pending.append(batch)
+        n_pending += batch.num_rows
+        if n_pending >= buffer_rows:
+            yield from sort_for_layout(pa.Table.from_batches(pending)).to_batches()
+            pending, n_pending = [], 0
+
+    if pending:
+        yield from sort_for_layout(pa.Table.from_batches(pending)).to_batches()
+
+
+def append_partitions(data, catalog_dir: str, run_tag: str = None):
+    """
+    Append rows to the catalog as new part files, leaving existing part files untouched.
+
+    `data` may be a table or any iterable of CATALOG_SCHEMA record batches; batches are
+    flushed to their year/month partitions as they arrive with bounded row groups.
+    Each run writes under its own basename (part-<run_tag>-{i}.parquet), so
+    `overwrite_or_ignore` never clobbers files from earlier refreshes.
+    """
+    run_tag = run_tag or datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    ds.write_dataset(
+        data,
+        base_dir=catalog_dir,
+        schema=None if isinstance(data, pa.Table) else CATALOG_SCHEMA,
+        format="parquet",
+        partitioning=["year", "month"],
+        partitioning_flavor="hive",
+        existing_data_behavior="overwrite_or_ignore",
+        basename_template=f"part-{run_tag}-{{i}}.parquet",
+        min_rows_per_group=MIN_ROWS_PER_GROUP,
+        max_rows_per_group=MAX_ROWS_PER_GROUP,
+        max_rows_per_file=MAX_ROWS_PER_FILE
+    )
+
+
+def _month_floor(year: int, month: int):
+    """
+    Partition-key expression for "partition is at or after year/month".
+    """
+    y, m = ds.field("year"), ds.field("month")
+    return y.is_null() | (y > year) | ((y == year) & (m >= month))
+
+
+def _month_ceil(year: int, month: int):
+    """
+    Partition-key expression for "partition is at or before year/month".
+    """
+    y, m = ds.field("year"), ds.field("month")
+    return y.is_null() | (y < year) | ((y == year) & (m <= month))
+
+
+def catalog_filter(bbox=None, start: str = None, end: str = None, orbit_direction: str = None, track=None):
+    """
+    Build a pyarrow dataset filter for an AOI/date/geometry query.
+
+    Args:
+        bbox (tuple): (xmin, ymin, xmax, ymax) in WGS84; rows whose footprint bounds overlap it are kept.
+        start (str): first acquisition date, YYYY-MM-DD (inclusive).
+        end (str): last acquisition date, YYYY-MM-DD (inclusive).
+        orbit_direction (str): "ASCENDING" or "DESCENDING".
+        track (int or list): relative orbit number(s).
+    """
+    expr = ds.scalar(True)
+    if bbox is not None:
+        x0, y0, x1, y1 = bbox
+        expr &= (ds.field("xmin") <= x1) & (ds.field("xmax") >= x0) \
+              & (ds.field("ymin") <= y1) & (ds.field("ymax") >= y0)
+    if start is not None:
+        expr &= _month_floor(int(start[:4]), int(start[5:7])) & (ds.field("startTime") >= start)
+    if end is not None:
+        # startTime is an ISO string, so compare against the start of the following day
+        after = (datetime.fromisoformat(end[:10]) + timedelta(days=1)).strftime("%Y-%m-%d")
+        expr &= _month_ceil(int(end[:4]), int(end[5:7])) & (ds.field("startTime") < after)
+    if orbit_direction is not None:
+        expr &= ds.field("orbitDirection") == orbit_direction
+    if track is not None:
+        tracks = [track] if isinstance(track, int) else list(track)
+        expr &= ds.field("track").isin(tracks)
+    return expr
+
+
+def query_catalog(
+    catalog_dir:     str,
+    bbox:            tuple = None,
+    start:           str   = None,
+    end:             str   = None,
+    orbit_direction: str   = None,
+    track                  = None,
+    columns:         list  = None,
+    exact:           bool  = True
+) -> pa.Table:
+    """
+    Return the catalog rows matching an AOI/date/orbit query.
+
+    The filter is pushed down to the Parquet scan: year/month partitions outside the date range
+    are never opened and row groups whose xmin/ymin/xmax/ymax, startTime or track statistics
+    cannot match are skipped. With `exact`, the surviving rows are refined with a vectorised
+    footprint/bbox intersection test. Rows are unique by fileID even while a compaction is
+    swapping a partition's files.
+    """
+    dataset = open_catalog(catalog_dir)
+    expr = catalog_filter(bbox, start, end, orbit_direction, track)
+
+    read_cols = columns
+    if columns is not None:
+        needed = ["fileID"] + (["geometry"] if exact and bbox is not None else [])
+        read_cols = list(columns) + [c for c in needed if c not in columns]
+    table = dedupe_file_ids(dataset.to_table(columns=read_cols, filter=expr))
+
+    if exact and bbox is not None and table.num_rows:
+        geoms = shapely.from_wkb(table.column("geometry").to_numpy(zero_copy_only=False))
+        table = table.filter(pa.array(shapely.intersects(geoms, shapely.box(*bbox)), pa.bool_()))
+    if columns is not None and read_cols != list(columns):
+        table = table.select(list(columns))
+    return table
+
+
+# — Track layout ————————————————————————————————
+# A second copy of the catalog partitioned as orbitDirection=X/track=N, one file per track with
+# rows already in startTime order, so pair selection can open tracks independently and in parallel.
+
+def write_track_layout(catalog_dir: str, track_dir: str, tracks=None) -> int:
+    """
+    Rebuild the track-partitioned copy of the catalog.
+
+    Args:
+        catalog_dir (str): year/month catalog to read from.
+        track_dir (str): root of the orbitDirection/track layout.
+        tracks (iterable): (orbitDirection, track) keys to rebuild; all tracks if None.
+
+    Returns:
+        int: number of track partitions written.
+    """
+    dataset = open_catalog(catalog_dir)
+    if tracks is None:
+        keys = dataset.to_table(columns=["orbitDirection", "track"]).group_by(["orbitDirection", "track"]).aggregate([])
+        tracks = zip(keys.column("orbitDirection").to_pylist(), keys.column("track").to_pylist())
+    tracks = sorted(set(tracks))
+
+    columns = [f.name for f in CATALOG_SCHEMA if f.name not in ("year", "month")]
+    for direction, track in tracks:
+        # track/orbitDirection statistics are tight after sort_for_layout, so this read skips most row groups
+        tbl = dataset.to_table(
+            columns=columns,
+            filter=(ds.field("orbitDirection") == direction) & (ds.field("track") == track)
+        )
+        tbl = dedupe_file_ids(tbl).sort_by([("startTime", "ascending")])
+        ds.write_dataset(
+            tbl,
+            base_dir=track_dir,
+            format="parquet",
+            partitioning=["orbitDirection", "track"],
+            partitioning_flavor="hive",
+            existing_data_behavior="delete_matching",
+            basename_template="part-{i}.parquet",
+            max_rows_per_group=MAX_ROWS_PER_GROUP,
+            max_rows_per_file=max(tbl.num_rows, MAX_ROWS_PER_GROUP)
+        )
+    return len(tracks)
+
+
+def list_tracks(track_dir: str) -> list:
+    """
+    List the (orbitDirection, track) keys present in a track layout, from directory names only.
+    """
+    keys = []
+    for d_dir in sorted(os.listdir(track_dir)):
+        if not d_dir.startswith("orbitDirection="):
+            continue
+        for t_dir in os.listdir(os.path.join(track_dir, d_dir)):
+            if t_dir.startswith("track="):
+                keys.append((d_dir.split("=", 1)[1], int(t_dir.split("=", 1)[1])))
+    return sorted(keys)
+
+
+def read_track(track_dir: str, orbit_direction: str, track: int, columns: list = None) -> pa.Table:
+    """
+    Read one track from the track layout; rows come back in startTime order without sorting.
+    """
+    path = os.path.join(track_dir, f"orbitDirection={orbit_direction}", f"track={track}")
+    files = sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith(".parquet"))
+
+    # the partition keys live in the directory names, not in the files
+    keys = {"orbitDirection": pa.scalar(orbit_direction, pa.string()), "track": pa.scalar(track, pa.int64())}
+    wanted = columns if columns is not None else [f.name for f in CATALOG_SCHEMA if f.name not in ("year", "month")]
+    tbl = ds.dataset(files, format="parquet").to_table(columns=[c for c in wanted if c not in keys])
+    for i, name in enumerate(wanted):
+        if name in keys:
+            tbl = tbl.add_column(i, name, pa.array([keys[name].as_py()] * tbl.num_rows, keys[name].type))
+    return tbl
+
+
+def iter_tracks(track_dir: str, columns: list = None, workers: int = 4, tracks: list = None):
+    """
+    Yield ((orbitDirection, track), table) for every track, reading tracks concurrently.
+
+    Tracks are yielded in list_tracks order regardless of which read finishes first.
+    """
+    keys = tracks if tracks is not None else list_tracks(track_dir)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        tables = pool.map(lambda k: read_track(track_dir, k[0], k[1], columns), keys)
+        yield from zip(keys, tables)
+
+
+# — Compaction ——————————————————————————————————
+
+def file_schema() -> pa.Schema:
+    """
+    Schema of a single part file (the catalog columns without the Hive partition keys).
+    """
+    return pa.schema([f for f in CATALOG_SCHEMA if f.name not in ("year", "month")], metadata=CATALOG_SCHEMA.metadata)
+
+
+def dedupe_file_ids(table: pa.Table) -> pa.Table:
+    """
+    Keep one row per fileID: the last occurrence, so rows from later refreshes win.
+    """
+    idx = pa.array(range(table.num_rows), pa.int64())
+    last = (
+        table.append_column("_row", idx)
+             .group_by("fileID")
+             .aggregate([("_row", "max")])
+             .column("_row_max")
+    )
+    return table.take(pc.take(last, pc.sort_indices(last)))
+
+
+COMPACT_NAME = "part-compacted.parquet"
+
+
+def _recover_partition(part_dir: str):
+    """
+    Clean up after a compaction that was interrupted.
+
+    Also restores partitions left half-swapped by the earlier directory-rename compaction
+    (.month=MM.old / .month=MM.compact siblings).
+    """
+    parent, name = os.path.split(part_dir)
+    tmp_dir, old_dir = os.path.join(parent, f".{name}.compact"), os.path.join(parent, f".{name}.old")
+    if os.path.isdir(old_dir):
+        if not os.path.isdir(part_dir):
+            os.rename(old_dir, part_dir)      # crashed between the two renames; restore the original
+        else:
+            shutil.rmtree(old_dir)
+    if os.path.isdir(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    # a hidden compacted file that was never renamed into place
+    for tmp in glob.glob(os.path.join(part_dir, f".{COMPACT_NAME}*")):
+        os.remove(tmp)
+
+
+def compact_partition(part_dir: str, row_group_size: int = MAX_ROWS_PER_GROUP) -> dict:
+    """
+    Rewrite one year=/month= partition as a single deduplicated, sorted part file.
+
+    The new file is written into the partition under a hidden name (ignored by dataset
+    discovery), renamed into place, and only then are the old part files removed. The swap is
+    not atomic: a concurrent reader may briefly see the old files and the compacted one
+    together (duplicate fileIDs), but never a partition with rows missing. A crash in between
+    leaves those duplicates until the next compaction removes them, so the catalog readers
+    (query_catalog, write_track_layout, the key index) keep one row per fileID themselves.
+    """
+    _recover_partition(part_dir)
+
+    # oldest first, so dedupe_file_ids keeps the row from the most recent refresh
+    files = sorted(glob.glob(os.path.join(part_dir, "*.parquet")), key=os.path.getmtime)
+    table = ds.dataset(files, schema=file_schema(), format="parquet").to_table()
+    n_in  = table.num_rows
+    table = sort_for_layout(dedupe_file_ids(table))
+
+    out = os.path.join(part_dir, COMPACT_NAME)
+    tmp = os.path.join(part_dir, f".{COMPACT_NAME}.tmp")
+    pq.write_table(table, tmp, row_group_size=row_group_size)
+    with open(tmp, "rb") as f:
+        os.fsync(f.fileno())
+
+    os.replace(tmp, out)    # replaces a previous compaction's file, whose rows are in `table`
+    for path in files:
+        if path != out:
+            os.remove(path)
+    return {"files": len(files), "rows_in": n_in, "rows_out": table.num_rows}
+
+
+def compact_catalog(catalog_dir: str, min_files: int = 2, row_group_size: int = MAX_ROWS_PER_GROUP) -> list:
+    """
+    Compact every year=/month= partition holding at least `min_files` part files.
+
+    Set min_files=1 to also deduplicate and re-sort partitions that already have a single file.
+    Returns one summary dict per compacted partition.
+    """
+    # partitions whose previous compaction died between the two renames only exist as .month=MM.old
+    for old_dir in glob.glob(os.path.join(catalog_dir, "year=*", ".month=*.old")):
+        parent, name = os.path.split(old_dir)
+        _recover_partition(os.path.join(parent, name[1:-len(".old")]))
+
+    summaries = []
+    for part_dir in sorted(glob.glob(os.path.join(catalog_dir, "year=*", "month=*"))):
+        _recover_partition(part_dir)
+        n_files = len(glob.glob(os.path.join(part_dir, "*.parquet")))
+        if n_files < min_files:
+            continue
+        summary = compact_partition(part_dir, row_group_size)
+        summary["partition"] = os.path.relpath(part_dir, catalog_dir)
+        summaries.append(summary)
+    return summaries
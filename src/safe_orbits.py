@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Offline temporal / perpendicular baselines from the orbit state vectors in Sentinel-1 SLC SAFE zip annotations
+"""
+"""
+@Time    : 2026-10-17
+@Author  : Colm Keyes
+@Email   : keyesco@tcd.ie
+@File    : safe_orbits.py
+"""
+
+import os
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from burst_index import annotation_members
+from baselines import DAY_NS
+
+POLY_DEG = 6            # orbit polynomial degree; the annotation orbitList spans a few minutes at 10 s spacing
+NEWTON_ITERATIONS = 6   # zero-Doppler time refinement steps
+
+# WGS84
+WGS84_A  = 6378137.0
+WGS84_E2 = 6.69437999014e-3
+
+
+def geodetic_to_ecef(lat, lon, h) -> np.ndarray:
+    """
+    WGS84 latitude / longitude (degrees) and ellipsoid height (m) to ECEF (m), vectorised.
+    """
+    lat, lon = np.radians(lat), np.radians(lon)
+    n = WGS84_A / np.sqrt(1 - WGS84_E2 * np.sin(lat) ** 2)
+    return np.stack([
+        (n + h) * np.cos(lat) * np.cos(lon),
+        (n + h) * np.cos(lat) * np.sin(lon),
+        (n * (1 - WGS84_E2) + h) * np.sin(lat),
+    ], axis=-1)
+
+
+def _epoch_seconds(values) -> np.ndarray:
+    return np.array(values, dtype="datetime64[us]").astype(np.int64) / 1e6
+
+
+def parse_orbit(root: ET.Element) -> dict:
+    """
+    Orbit polynomials, scene timing and scene-centre target from one subswath annotation.
+
+    Positions and velocities are fitted separately with polynomials in (t - t0), t0 being
+    the scene mid time, so any instant near the scene is evaluated with a few multiply-adds.
+    """
+    orbits = root.findall("generalAnnotation/orbitList/orbit")
+    t   = _epoch_seconds([o.findtext("time") for o in orbits])
+    pos = np.array([[float(o.findtext(f"position/{c}")) for c in "xyz"] for o in orbits])
+    vel = np.array([[float(o.findtext(f"velocity/{c}")) for c in "xyz"] for o in orbits])
+
+    first = root.findtext("imageAnnotation/imageInformation/productFirstLineUtcTime")
+    last  = root.findtext("imageAnnotation/imageInformation/productLastLineUtcTime")
+    t0 = _epoch_seconds([first, last]).mean()
+
+    points = root.findall("geolocationGrid/geolocationGridPointList/geolocationGridPoint")
+    llh = np.array([[float(p.findtext(k)) for k in ("latitude", "longitude", "height")] for p in points])
+
+    deg = min(POLY_DEG, len(t) - 1)
+    return {
+        "startTime": first,
+        "t0":        t0,
+        "pos_coef":  np.polynomial.polynomial.polyfit(t - t0, pos, deg),
+        "vel_coef":  np.polynomial.polynomial.polyfit(t - t0, vel, deg),
+        "target":    geodetic_to_ecef(*llh.mean(axis=0)),
+    }
+
+
+def read_scene_orbit(path: str) -> dict:
+    """
+    parse_orbit for an SLC .zip read in place; the orbit list is the same in every subswath,
+    the centre subswath (IW2) gives the scene-centre target.
+    """
+    with zipfile.ZipFile(path) as zf:
+        members = annotation_members(zf)
+        if not members:
+            raise ValueError("no IW annotation in zip")
+        with zf.open(members.get("IW2") or next(iter(members.values()))) as f:
+            return parse_orbit(ET.parse(f).getroot())
+
+
+def load_scene_orbits(zip_paths: dict, workers: int = 4) -> dict:
+    """
+    Parse many zips in a process pool.
+
+    Args:
+        zip_paths (dict): fileID -> SLC zip path.
+
+    Returns:
+        dict: fileID -> orbit dict; missing or unreadable zips are reported and left out.
+    """
+    orbits = {}
+    todo = {fid: p for fid, p in zip_paths.items() if os.path.exists(p)}
+    for fid in sorted(set(zip_paths) - set(todo)):
+        print(f"  ❌ {fid}: {zip_paths[fid]} not found")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {fid: pool.submit(read_scene_orbit, p) for fid, p in todo.items()}
+        for fid, fut in futures.items():
+            try:
+                orbits[fid] = fut.result()
+            except Exception as e:
+                print(f"  ❌ {fid}: {e}")
+    return orbits
+
+
+def polyval(coef: np.ndarray, dt: np.ndarray) -> np.ndarray:
+    """
+    Evaluate per-row polynomials: coef (m, deg + 1, 3), dt (m,) -> (m, 3), by Horner's rule.
+    """
+    out = np.zeros((coef.shape[0], coef.shape[2]))
+    for k in range(coef.shape[1] - 1, -1, -1):
+        out = out * dt[:, None] + coef[:, k]
+    return out
+
+
+def zero_doppler(pos_coef: np.ndarray, vel_coef: np.ndarray, target: np.ndarray):
+    """
+    Satellite position / velocity at the zero-Doppler time of each target, (m, 3) each.
+
+    Solves (R(t) - P) . V(t) = 0 for every row at once by Newton steps from t = t0.
+    """
+    dt = np.zeros(len(target))
+    for _ in range(NEWTON_ITERATIONS):
+        r, v = polyval(pos_coef, dt), polyval(vel_coef, dt)
+        dt -= ((r - target) * v).sum(axis=1) / (v * v).sum(axis=1)
+    return polyval(pos_coef, dt), polyval(vel_coef, dt)
+
+
+def pair_baselines(orbits: dict, ref_ids, sec_ids):
+    """
+    Temporal and perpendicular baselines for aligned reference / secondary fileID lists.
+
+    The perpendicular baseline is the component of the satellite separation orthogonal to
+    the reference line of sight to the reference scene centre, both satellites taken at
+    their zero-Doppler times for that point. Signed: positive when the secondary lies on the
+    far side of the look direction's cross-track plane, i.e. (B x l) . v_ref > 0.
+
+    Returns:
+        (temp_days, bperp) arrays; rows whose scenes are missing from orbits are -1 / NaN.
+    """
+    ref_ids, sec_ids = list(ref_ids), list(sec_ids)
+    ok = np.array([r in orbits and s in orbits for r, s in zip(ref_ids, sec_ids)], dtype=bool)
+    temp  = np.full(len(ref_ids), -1, dtype=np.int64)
+    bperp = np.full(len(ref_ids), np.nan)
+    if not ok.any():
+        return temp, bperp
+
+    ref = [orbits[f] for f, k in zip(ref_ids, ok) if k]
+    sec = [orbits[f] for f, k in zip(sec_ids, ok) if k]
+    target = np.stack([o["target"] for o in ref])
+
+    r_m, v_m = zero_doppler(np.stack([o["pos_coef"] for o in ref]), np.stack([o["vel_coef"] for o in ref]), target)
+    r_s, _   = zero_doppler(np.stack([o["pos_coef"] for o in sec]), np.stack([o["vel_coef"] for o in sec]), target)
+
+    look = target - r_m
+    look /= np.linalg.norm(look, axis=1, keepdims=True)
+    b = r_s - r_m
+    b_par  = (b * look).sum(axis=1)
+    b_perp = np.sqrt(np.maximum((b * b).sum(axis=1) - b_par ** 2, 0.0))
+    sign   = np.sign((np.cross(b, look) * v_m).sum(axis=1))
+
+    starts_m = np.array([o["startTime"] for o in ref], dtype="datetime64[ns]").astype(np.int64)
+    starts_s = np.array([o["startTime"] for o in sec], dtype="datetime64[ns]").astype(np.int64)
+    temp[ok]  = (starts_s - starts_m) // DAY_NS
+    bperp[ok] = np.where(sign < 0, -b_perp, b_perp)
+    return temp, bperp
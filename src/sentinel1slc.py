@@ -24,7 +24,8 @@ import os, gc
 from esa_snappy import GPF
 import numpy as np
 import matplotlib.pyplot as plt
-import pandas as pd
+import pair_table
+import pair_schedule
 
 ##############
 ## steps needed are:
@@ -204,8 +205,20 @@ def main(pols,
          product_type,
          outpath,
          SLC_path=None,
-         path_asf_csv=None
+         path_asf_csv=None,
+         ready_queue=None,
+         ready_poll=30.0,
+         ready_since=None,
+         pairs=None
          ):
+    """
+    Process every pair of the pair table at path_asf_csv (or of the `pairs` DataFrame, e.g. a
+    single pair when the caller drives the order and releases scenes through an SLCStore).
+
+    With ready_queue (the downloader's pairs_ready.jsonl), pairs are processed in the order
+    their archives finish downloading, waiting for more until the downloader reports it is done,
+    instead of in table order with missing archives skipped (ready_since: see pair_schedule.follow_ready).
+    """
     
     if not os.path.exists(outpath):
         os.makedirs(outpath)
@@ -213,11 +226,16 @@ def main(pols,
     folder_paths = []
     sentinel1_spacing = [14.04, 3.68]
     
-    # Read the pairs CSV with new structure
-    pairs_csv = pd.read_csv(path_asf_csv)
-    print(f"Processing {len(pairs_csv)} pairs from {path_asf_csv}")
+    # Read the typed pair table (Parquet, or a legacy pairs CSV)
+    pairs_csv = pair_table.read_pairs(path_asf_csv) if pairs is None else pairs
+    print(f"Processing {len(pairs_csv)} pairs from {path_asf_csv if pairs is None else 'the given table'}")
+    if ready_queue:
+        print(f"Following pair-ready events in {ready_queue}")
+        pair_iter = pair_schedule.follow_ready(ready_queue, pairs_csv, poll=ready_poll, since=ready_since)
+    else:
+        pair_iter = pairs_csv.iterrows()
     
-    for idx, pair in pairs_csv.iterrows():
+    for idx, pair in pair_iter:
         # Extract master and slave file IDs from the new CSV structure
         master_file_id = pair['master_id']
         slave_file_id = pair['slave_id']
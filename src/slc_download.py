@@ -0,0 +1,486 @@
+# -*- coding: utf-8 -*-
+"""
+Resumable chunked HTTP download of SLC archives with size / MD5 verification, atomic completion, adaptive concurrency and transfer metrics
+"""
+"""
+@Time    : 2026-10-17
+@Author  : Colm Keyes
+@Email   : keyesco@tcd.ie
+@File    : slc_download.py
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CHUNK_SIZE = 8 * 1024 * 1024
+PART_SUFFIX = ".part"
+THROTTLE_STATUS = {429, 503}   # server asking us to slow down
+RETRY_4XX       = {408, 429}   # the only client errors worth retrying; any other 4xx is permanent
+
+
+class DownloadError(Exception):
+    pass
+
+
+def pooled_session(session: requests.Session, max_connections: int) -> requests.Session:
+    """
+    Give an (already authenticated) session a keep-alive connection pool large enough for
+    max_connections concurrent transfers, so all downloads share one login and reuse sockets.
+    """
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_connections)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class AdaptiveLimiter:
+    """
+    AIMD cap on in-flight transfers, driven by observed throughput.
+
+    Every `window` seconds the aggregate rate is compared with the previous window:
+    - a throttling response (429/503) in the window halves the cap (multiplicative decrease);
+    - while all slots are busy and the rate grew by more than `gain`, the cap goes up by one
+      (additive increase), probing for spare bandwidth;
+    - if the rate did not grow after an increase, that step is undone and the cap holds.
+    The cap stays within [min_limit, max_limit]. Transfers already running are never cut;
+    a lower cap only delays the next start. Slots are granted first come, first served, so
+    transfers start in the order they were queued.
+    """
+
+    def __init__(self, min_limit: int = 1, max_limit: int = 8, start: int = None, window: float = 10.0, gain: float = 0.05):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit     = max(min_limit, min(max_limit, start or min_limit))
+        self.window    = window
+        self.gain      = gain
+        self.active    = 0
+        self._cond     = threading.Condition()
+        self._bytes    = 0
+        self._throttled = 0
+        self._since    = time.monotonic()
+        self._last_rate = None
+        self._increased = False
+        self._tickets  = 0
+        self._serving  = 0
+
+    def acquire(self):
+        with self._cond:
+            ticket = self._tickets
+            self._tickets += 1
+            self._cond.wait_for(lambda: self._serving == ticket and self.active < self.limit)
+            self._serving += 1
+            self.active += 1
+            self._cond.notify_all()
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    def add_bytes(self, n: int):
+        with self._cond:
+            self._bytes += n
+            self._maybe_adjust()
+
+    def throttled(self):
+        with self._cond:
+            self._throttled += 1
+            self._maybe_adjust()
+
+    def _maybe_adjust(self):
+        now = time.monotonic()
+        if now - self._since < self.window:
+            return
+        rate, old = self._bytes / (now - self._since), self.limit
+        if self._throttled:
+            self.limit = max(self.min_limit, self.limit // 2)
+            self._increased = False
+        elif self._last_rate is not None and self._increased and rate <= self._last_rate * (1 + self.gain):
+            self.limit = max(self.min_limit, self.limit - 1)
+            self._increased = False
+        elif self.active >= self.limit and (self._last_rate is None or rate > self._last_rate * (1 + self.gain)):
+            self.limit = min(self.max_limit, self.limit + 1)
+            self._increased = self.limit > old
+        if self.limit != old:
+            print(f"  ⇅ {rate / 1e6:.1f} MB/s over {self.active} transfers: concurrency {old} -> {self.limit}")
+            self._cond.notify_all()
+        self._last_rate, self._bytes, self._throttled, self._since = rate, 0, 0, now
+
+
+class DownloadMonitor:
+    """
+    Per-file and aggregate transfer metrics, appended to a JSON-lines log and summarised on stdout.
+
+    Events (the "event" field of each log line):
+    - file: one per finished download - bytes, seconds, MB/s, mean time to first byte,
+      retries, serving host (after redirects) and error
+    - progress: every `interval` seconds - bytes done / total, MB/s over the interval and
+      overall, active transfers, concurrency cap, files done / failed and ETA
+    - stall: an active transfer that has received nothing for `stall_after` seconds
+    - summary: at stop, totals and per-host MB/s / time to first byte
+    Bytes resumed from earlier .part files count as done but not toward the rates; bytes
+    discarded (a restart from zero, a checksum failure) stop counting as done, so progress
+    tracks what is on disk.
+    """
+
+    def __init__(self, log_path: str = None, interval: float = 30.0, stall_after: float = 120.0):
+        self.log_path    = log_path
+        self.interval    = interval
+        self.stall_after = stall_after
+        self.limiter     = None     # set by download_all to report the concurrency cap
+        self.total       = 0
+        self.done_bytes  = 0
+        self.transferred = 0
+        self.ok = self.failed = 0
+        self.files = {}
+        self.hosts = {}
+        self._lock   = threading.Lock()
+        self._stop   = threading.Event()
+        self._thread = None
+        self._t0     = time.monotonic()
+        self._mark   = (self._t0, 0)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self._t0 = time.monotonic()
+        self._mark = (self._t0, self.transferred)
+        self._thread = threading.Thread(target=self._tick, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        with self._lock:
+            self._progress()
+            self._summary()
+
+    def add_plan(self, plan):
+        """
+        Count a plan's bytes toward the total, and any .part already on disk as done.
+        """
+        with self._lock:
+            for r in plan.itertuples(index=False):
+                if r.bytes is not None and r.bytes == r.bytes:
+                    self.total += int(r.bytes)
+                part = r.path + PART_SUFFIX
+                if os.path.exists(part):
+                    self.done_bytes += os.path.getsize(part)
+
+    # — hooks called from the transfer threads ——————————————————————————————
+    def started(self, path: str):
+        now = time.monotonic()
+        with self._lock:
+            self.files[path] = {"start": now, "last": now, "bytes": 0, "ttfb": [], "retries": 0, "host": None}
+
+    def first_byte(self, path: str, ttfb: float, url: str):
+        with self._lock:
+            f = self.files[path]
+            f["ttfb"].append(ttfb)
+            f["host"] = urlparse(url).netloc
+
+    def add_bytes(self, path: str, n: int):
+        with self._lock:
+            f = self.files[path]
+            f["bytes"] += n
+            f["last"] = time.monotonic()
+            self.transferred += n
+            self.done_bytes += n
+
+    def discard(self, path: str, n: int):
+        """
+        Bytes thrown away (a .part restarted from zero or removed): no longer done.
+        """
+        with self._lock:
+            self.done_bytes -= n
+
+    def retry(self, path: str, error: str):
+        with self._lock:
+            self.files[path]["retries"] += 1
+
+    def finished(self, path: str, error: str = None):
+        with self._lock:
+            f = self.files.pop(path)
+            secs = time.monotonic() - f["start"]
+            ttfb = sum(f["ttfb"]) / len(f["ttfb"]) if f["ttfb"] else None
+            if error:
+                self.failed += 1
+            else:
+                self.ok += 1
+            if f["host"]:
+                h = self.hosts.setdefault(f["host"], {"files": 0, "bytes": 0, "seconds": 0.0, "ttfb": []})
+                h["files"] += 1
+                h["bytes"] += f["bytes"]
+                h["seconds"] += secs
+                h["ttfb"] += f["ttfb"]
+            self._emit({
+                "event":   "file",
+                "file":    os.path.basename(path),
+                "host":    f["host"],
+                "bytes":   f["bytes"],
+                "seconds": round(secs, 3),
+                "mb_s":    round(f["bytes"] / secs / 1e6, 3) if secs else None,
+                "ttfb_s":  None if ttfb is None else round(ttfb, 3),
+                "retries": f["retries"],
+                "error":   error,
+            })
+
+    # — reporting ——————————————————————————————
+    def _emit(self, event: dict):
+        if not self.log_path:
+            return
+        event = {"time": time.time(), **event}
+        with open(self.log_path, "a") as f:
+            f.write(json.dumps(event) + "\n")
+
+    def _tick(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                self._progress()
+                now = time.monotonic()
+                for path, f in self.files.items():
+                    idle = now - f["last"]
+                    if idle >= self.stall_after:
+                        print(f"  ⚠ {os.path.basename(path)}: no data for {idle:.0f}s")
+                        self._emit({"event": "stall", "file": os.path.basename(path), "host": f["host"], "idle_s": round(idle, 1)})
+
+    def _progress(self):
+        now = time.monotonic()
+        (then, before), self._mark = self._mark, (now, self.transferred)
+        rate = (self.transferred - before) / (now - then) if now > then else 0.0
+        mean = self.transferred / (now - self._t0) if now > self._t0 else 0.0
+        remaining = max(self.total - self.done_bytes, 0)
+        eta = remaining / rate if rate else None
+        self._emit({
+            "event":      "progress",
+            "done_bytes": self.done_bytes,
+            "total_bytes": self.total,
+            "mb_s":       round(rate / 1e6, 3),
+            "mean_mb_s":  round(mean / 1e6, 3),
+            "active":     len(self.files),
+            "limit":      self.limiter.limit if self.limiter else None,
+            "files_ok":   self.ok,
+            "files_failed": self.failed,
+            "eta_s":      None if eta is None else round(eta),
+        })
+        pct = 100 * self.done_bytes / self.total if self.total else 0.0
+        eta_txt = time.strftime("%H:%M:%S", time.gmtime(eta)) if eta is not None and eta < 86400 else "--"
+        print(
+            f"  ⏱ {self.done_bytes / 1e9:.1f}/{self.total / 1e9:.1f} GB ({pct:.0f}%), "
+            f"{rate / 1e6:.1f} MB/s now, {mean / 1e6:.1f} MB/s mean, {len(self.files)} active, "
+            f"{self.ok} done, {self.failed} failed, ETA {eta_txt}"
+        )
+
+    def _summary(self):
+        secs = time.monotonic() - self._t0
+        hosts = {
+            host: {
+                "files":  h["files"],
+                "mb_s":   round(h["bytes"] / h["seconds"] / 1e6, 3) if h["seconds"] else None,
+                "ttfb_s": round(sum(h["ttfb"]) / len(h["ttfb"]), 3) if h["ttfb"] else None,
+            }
+            for host, h in self.hosts.items()
+        }
+        self._emit({
+            "event":    "summary",
+            "bytes":    self.transferred,
+            "seconds":  round(secs, 1),
+            "mean_mb_s": round(self.transferred / secs / 1e6, 3) if secs else None,
+            "files_ok": self.ok,
+            "files_failed": self.failed,
+            "hosts":    hosts,
+        })
+        for host, h in sorted(hosts.items(), key=lambda kv: kv[1]["mb_s"] or 0):
+            print(f"  {host}: {h['files']} files, {h['mb_s']} MB/s per transfer, {h['ttfb_s']}s to first byte")
+
+
+def _hash_prefix(path: str, length: int):
+    """
+    md5 state over the first `length` bytes of a partial file, so a resumed download can keep hashing.
+    """
+    h = hashlib.md5()
+    with open(path, "rb") as f:
+        remaining = length
+        while remaining:
+            block = f.read(min(CHUNK_SIZE, remaining))
+            if not block:
+                break
+            h.update(block)
+            remaining -= len(block)
+    return h
+
+
+def download_file(url: str, dest: str, session: requests.Session, size: int = None, md5: str = None,
+                  chunk_size: int = CHUNK_SIZE, timeout: float = 60.0, retries: int = 5, backoff: float = 2.0,
+                  limiter: AdaptiveLimiter = None, monitor: DownloadMonitor = None) -> int:
+    """
+    Stream url to dest via dest + ".part", resuming with HTTP Range requests after interruptions.
+
+    The finished .part is checked against the catalog size and md5sum (when given) and only
+    then renamed onto dest, so dest never holds a partial or corrupt archive.
+
+    Args:
+        session (requests.Session): authenticated session (asf.ASFSession for ASF; any session in tests).
+        size (int): expected bytes; None skips the size check.
+        md5 (str): expected hex digest; None skips the checksum.
+        timeout (float): connect / read timeout per request, seconds.
+        retries (int): attempts after the first, each resuming from the bytes already on disk;
+                       client errors (4xx other than RETRY_4XX, e.g. an expired token or a
+                       missing product) fail at once.
+        backoff (float): first retry delay, doubled per retry.
+        limiter (AdaptiveLimiter): fed every block received and every throttling response.
+        monitor (DownloadMonitor): fed time to first byte, every block and every retry
+                                   (the caller reports started / finished).
+
+    Returns:
+        int: bytes transferred by this call (excludes bytes resumed from an earlier .part).
+    """
+    part = dest + PART_SUFFIX
+    transferred = 0
+    for attempt in range(retries + 1):
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        if size is not None and offset > size:
+            os.remove(part)
+            if monitor:
+                monitor.discard(dest, offset)
+            offset = 0
+        hasher = (_hash_prefix(part, offset) if offset else hashlib.md5()) if md5 else None
+        try:
+            if size is not None and offset == size:
+                break   # a previous attempt got every byte; just verify and rename
+            headers = {"Range": f"bytes={offset}-"} if offset else {}
+            requested = time.monotonic()
+            with session.get(url, headers=headers, stream=True, timeout=timeout) as r:
+                if offset and r.status_code == 416:
+                    break   # range starts at the end: nothing left to fetch
+                if limiter and r.status_code in THROTTLE_STATUS:
+                    limiter.throttled()
+                r.raise_for_status()
+                if monitor:
+                    # response headers in (stream=True returns before the body): time to first byte
+                    monitor.first_byte(dest, time.monotonic() - requested, r.url)
+                if offset and r.status_code != 206:
+                    # server ignored the range: start over
+                    if monitor:
+                        monitor.discard(dest, offset)
+                    offset = 0
+                    hasher = hashlib.md5() if md5 else None
+                with open(part, "ab" if offset else "wb") as f:
+                    for block in r.iter_content(chunk_size=chunk_size):
+                        f.write(block)
+                        transferred += len(block)
+                        if limiter:
+                            limiter.add_bytes(len(block))
+                        if monitor:
+                            monitor.add_bytes(dest, len(block))
+                        if hasher:
+                            hasher.update(block)
+            got = os.path.getsize(part)
+            if size is None or got == size:
+                break
+            raise DownloadError(f"connection closed at {got}/{size} bytes")
+        except (requests.RequestException, OSError, DownloadError) as e:
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            if status is not None and 400 <= status < 500 and status not in RETRY_4XX:
+                raise DownloadError(f"{os.path.basename(dest)}: {e}") from e
+            if attempt == retries:
+                raise DownloadError(f"{os.path.basename(dest)}: gave up after {retries} retries: {e}") from e
+            delay = backoff * 2 ** attempt
+            print(f"  ↻ {os.path.basename(dest)}: {e}; resuming in {delay:.0f}s")
+            if monitor:
+                monitor.retry(dest, str(e))
+            throttled = limiter and status in THROTTLE_STATUS
+            if throttled:
+                limiter.release()   # back off without holding a slot, so the lowered cap applies
+            time.sleep(delay)
+            if throttled:
+                limiter.acquire()
+
+    got = os.path.getsize(part)
+    if size is not None and got != size:
+        raise DownloadError(f"{os.path.basename(dest)}: size {got} != catalog {size}")
+    if md5 and hasher.hexdigest() != md5:
+        os.remove(part)   # a wrong checksum cannot be repaired by resuming
+        if monitor:
+            monitor.discard(dest, got)
+        raise DownloadError(f"{os.path.basename(dest)}: md5 mismatch, partial file removed")
+    os.replace(part, dest)
+    return transferred
+
+
+def download_all(plan, session: requests.Session, workers: int = 4, min_workers: int = None,
+                 start_workers: int = None, on_start=None, on_done=None, monitor: DownloadMonitor = None,
+                 **kwargs) -> dict:
+    """
+    Download the rows of a download plan (url, path, bytes, md5sum) over one pooled session.
+
+    Up to `workers` threads are available; an AdaptiveLimiter decides how many transfer at
+    once, between min_workers and workers (min_workers = workers gives fixed concurrency).
+    Transfers start in plan order.
+
+    Args:
+        on_start (callable): called as on_start(row) in the worker thread once the row has a
+                             slot, before its transfer begins (may block, e.g. for disk space).
+        on_done (callable): called as on_done(path, error) in the calling thread as each
+                            download finishes; error is None on success.
+        monitor (DownloadMonitor): records per-file and aggregate metrics; the plan is added
+                                   to its totals here, starting and stopping it is the caller's.
+
+    Returns:
+        dict: path -> None on success, or the error message.
+    """
+    def nullable(v):
+        return None if v is None or v != v else v
+
+    limiter = AdaptiveLimiter(min_workers or workers, workers, start=start_workers or min_workers or workers)
+    session = pooled_session(session, workers)
+    if monitor:
+        monitor.limiter = limiter
+        monitor.add_plan(plan)
+
+    def run(r):
+        limiter.acquire()
+        try:
+            if on_start:
+                on_start(r)
+            if monitor:
+                monitor.started(r.path)
+            return download_file(
+                r.url, r.path, session,
+                size=None if nullable(r.bytes) is None else int(r.bytes), md5=nullable(r.md5sum),
+                limiter=limiter, monitor=monitor, **kwargs
+            )
+        finally:
+            limiter.release()
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run, r): r.path for r in plan.itertuples(index=False)}
+        for fut in as_completed(futures):
+            path = futures[fut]
+            try:
+                n = fut.result()
+                results[path] = None
+                print(f"  ✅ {os.path.basename(path)} ({n / 1e6:.0f} MB transferred)")
+            except Exception as e:
+                results[path] = str(e)
+                print(f"  ❌ {e}")
+            if monitor and path in monitor.files:
+                monitor.finished(path, results[path])
+            if on_done:
+                on_done(path, results[path])
+    return results
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Reference-counted, disk-budgeted store of raw SLC zips: scenes are evicted once no pending pair needs them
+"""
+"""
+@Time    : 2026-10-17
+@Author  : Colm Keyes
+@Email   : keyesco@tcd.ie
+@File    : slc_store.py
+"""
+
+import os
+import json
+import time
+import threading
+from collections import Counter
+
+import pandas as pd
+
+import pair_table
+
+PROCESSED_NAME = "processed_pairs.jsonl"
+
+
+def _keys(pairs: pd.DataFrame) -> list:
+    return list(zip(pairs["master_fileID"].astype(str), pairs["slave_fileID"].astype(str)))
+
+
+def locality_order(pairs: pd.DataFrame) -> pd.DataFrame:
+    """
+    Pairs sorted so each scene's uses are close together: by track, then master and slave time.
+
+    Pair selection links each scene to its temporal neighbours, so sweeping a track in time
+    keeps only a sliding window of scenes live. Without times the table order is kept.
+    """
+    cols = [c for c in ("track", "master_time", "slave_time") if c in pairs.columns and pairs[c].notna().all()]
+    return pairs.sort_values(cols, kind="stable") if cols else pairs
+
+
+def peak_residency(pairs: pd.DataFrame) -> int:
+    """
+    Most scenes live at once when pairs are processed in this order (a scene is live from
+    the first to the last pair that uses it).
+    """
+    last = {}
+    for n, key in enumerate(_keys(pairs)):
+        for fid in key:
+            last[fid] = n
+    live, peak = set(), 0
+    for n, key in enumerate(_keys(pairs)):
+        live.update(key)
+        peak = max(peak, len(live))
+        live -= {fid for fid in key if last[fid] == n}
+    return peak
+
+
+class SLCStore:
+    """
+    Tracks, per scene, how many pending pairs still reference it, and keeps the zips of the
+    pair table's scenes in root within budget_bytes.
+
+    Pairs are marked processed with release(), which appends to root/processed_pairs.jsonl
+    (shared by the download and processing processes, and kept across runs) and deletes
+    every zip no pending pair references any more. Downloads call reserve() before starting:
+    it waits until the scene fits, evicting least recently used scenes nothing references and,
+    only if no pending pair is complete on disk (so processing could not free space), least
+    recently used referenced scenes, which are then downloaded again when needed.
+
+    Only zips of scenes in the pair table count toward the budget and are ever deleted.
+    """
+
+    def __init__(self, root: str, pairs: pd.DataFrame, budget_bytes: float = None, on_evict=None):
+        """
+        Args:
+            root (str): SLC directory (zips named <scene_id>.zip, as sentinel1slc expects).
+            pairs (pd.DataFrame): pair table with master/slave fileIDs and scene_ids.
+            budget_bytes (float): disk budget for this table's zips; None only ref-counts.
+            on_evict (callable): called with the fileIDs of evicted referenced scenes.
+        """
+        self.root     = root
+        self.pairs    = pair_table.normalise(pairs)
+        self.budget   = budget_bytes
+        self.on_evict = on_evict
+        self.log_path = os.path.join(root, PROCESSED_NAME)
+        self.path_of  = {}
+        for role in ("master", "slave"):
+            for fid, sid in zip(self.pairs[f"{role}_fileID"].astype(str), self.pairs[f"{role}_id"].astype(str)):
+                self.path_of[fid] = os.path.join(root, f"{sid}.zip")
+        self._lock     = threading.Lock()
+        self._reserved = {}
+        self.refresh()
+
+    # — reference counts ——————————————————————————————
+    def refresh(self):
+        """
+        Re-read the processed-pairs log (another process may have released pairs).
+        """
+        self.done = set()
+        if os.path.exists(self.log_path):
+            with open(self.log_path) as f:
+                for line in f:
+                    if line.endswith("\n"):
+                        e = json.loads(line)
+                        self.done.add((e["master_fileID"], e["slave_fileID"]))
+        self.refs = Counter(fid for key in _keys(self.pairs) if key not in self.done for fid in key)
+
+    def pending_pairs(self) -> pd.DataFrame:
+        return self.pairs[[key not in self.done for key in _keys(self.pairs)]]
+
+    def pending_scenes(self) -> set:
+        return {fid for fid, n in self.refs.items() if n}
+
+    def processing_order(self) -> pd.DataFrame:
+        return locality_order(self.pending_pairs())
+
+    # — disk ——————————————————————————————
+    def resident(self) -> dict:
+        """
+        fileID -> zip size for the table's scenes currently on disk.
+        """
+        out = {}
+        for fid, path in self.path_of.items():
+            if os.path.exists(path):
+                out[fid] = os.path.getsize(path)
+        return out
+
+    def used_bytes(self) -> int:
+        return sum(self.resident().values()) + sum(self._reserved.values())
+
+    def touch(self, *file_ids):
+        """
+        Mark scenes as just used (LRU order is zip mtime).
+        """
+        for fid in file_ids:
+            if os.path.exists(self.path_of[fid]):
+                os.utime(self.path_of[fid])
+
+    def _evict(self, fids) -> int:
+        freed = 0
+        for fid in fids:
+            path = self.path_of[fid]
+            if os.path.exists(path):
+                freed += os.path.getsize(path)
+                os.remove(path)
+        return freed
+
+    def release(self, master_fileID: str, slave_fileID: str) -> int:
+        """
+        Mark a pair processed and delete the zips of scenes no pending pair needs.
+
+        Returns:
+            int: bytes freed.
+        """
+        key = (str(master_fileID), str(slave_fileID))
+        with self._lock:
+            self.refresh()
+            if key in self.done:
+                return 0
+            with open(self.log_path, "a") as f:
+                f.write(json.dumps({"master_fileID": key[0], "slave_fileID": key[1], "time": time.time()}) + "\n")
+            self.done.add(key)
+            self.refs.subtract(key)
+            freed = self._evict([fid for fid in set(key) if self.refs[fid] <= 0])
+        if freed:
+            print(f"  ♻ Released {key[0]} / {key[1]}: {freed / 1e9:.1f} GB freed")
+        return freed
+
+    def _room_for(self, nbytes: int) -> bool:
+        return self.budget is None or self.used_bytes() + nbytes <= self.budget
+
+    def _make_room(self, nbytes: int) -> bool:
+        resident = self.resident()
+        lru = sorted(resident, key=lambda fid: os.path.getmtime(self.path_of[fid]))
+        for fid in [f for f in lru if self.refs[f] <= 0]:
+            self._evict([fid])
+            if self._room_for(nbytes):
+                return True
+        pending = _keys(self.pending_pairs())
+        if self._reserved or any(m in resident and s in resident for m, s in pending):
+            return False   # downloads in flight or processing will complete pairs; wait for them
+        evicted = []
+        for fid in [f for f in lru if self.refs[f] > 0]:
+            self._evict([fid])
+            evicted.append(fid)
+            if self._room_for(nbytes):
+                break
+        if evicted:
+            print(f"  ♻ Over budget with no pair ready: evicted {len(evicted)} referenced scenes (LRU)")
+            if self.on_evict:
+                self.on_evict(evicted)
+        return self._room_for(nbytes)
+
+    def reserve(self, fid: str, nbytes: int, poll: float = 30.0):
+        """
+        Block until a download of nbytes for fid fits the budget, then count it as in flight.
+        A size missing from the catalog (None / NaN) is counted as 0.
+        """
+        nbytes = 0 if nbytes is None or pd.isna(nbytes) else int(nbytes)
+        waiting = False
+        while True:
+            with self._lock:
+                self.refresh()
+                if self._room_for(nbytes) or self._make_room(nbytes):
+                    self._reserved[fid] = nbytes
+                    return
+                if not self._reserved and not self.resident():
+                    print(f"  ❌ {fid} ({nbytes / 1e9:.1f} GB) alone exceeds the SLC budget; downloading anyway")
+                    self._reserved[fid] = nbytes
+                    return
+            if not waiting:
+                print(f"  … {fid}: SLC budget full ({self.used_bytes() / 1e9:.1f} GB), waiting for processed pairs to be released")
+                waiting = True
+            time.sleep(poll)
+
+    def unreserve(self, fid: str):
+        with self._lock:
+            self._reserved.pop(fid, None)
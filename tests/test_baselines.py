@@ -0,0 +1,29 @@
+import numpy as np
+
+import baselines
+
+
+def _scenes():
+    times = baselines.to_ns(["2021-06-13T06:00:05Z", "2021-06-01T06:00:01Z", "2021-06-25T06:00:09Z"])
+    positions = baselines.stack_positions([[7e6, 0.0, 0.0], [7e6, 30.0, 40.0], None])
+    return times, positions
+
+
+def test_matrix_matches_pair_baselines():
+    times, positions = _scenes()
+    temp, perp = baselines.baseline_matrix(times, positions)
+    ref, sec = np.array([1, 0]), np.array([0, 2])
+    t, p = baselines.pair_baselines(times, positions, ref, sec)
+    assert temp[ref, sec].tolist() == t.tolist() == [12, 12]
+    assert temp[0, 1] == -13   # floored like timedelta.days
+    assert perp[1, 0] == p[0] == 50.0
+    assert np.isnan(perp[0, 2]) and np.isnan(p[1])
+
+
+def test_table_has_every_forward_pair_in_time_order():
+    times, positions = _scenes()
+    table = baselines.baseline_table(["B", "A", "C"], times, positions, track=37)
+    assert list(zip(table["Reference"], table["Secondary"])) == [("A", "B"), ("A", "C"), ("B", "C")]
+    assert table["temp_baseline"].tolist() == [12, 24, 12]
+    assert table["perp_baseline"].iloc[0] == 50.0
+    assert (table["track"] == 37).all()
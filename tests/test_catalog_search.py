@@ -0,0 +1,62 @@
+from datetime import date, timedelta
+
+import catalog_search as search
+
+BBOX = (108.0, -4.5, 119.0, 7.0)
+
+
+def _run(todo, manifest, fail=()):
+    """The step-1 loop: run sub-queries, mark the ones that came back done."""
+    def search_fn(q):
+        if q.start[:7] in fail:
+            raise RuntimeError("ASF timeout")
+        return [q.key]
+    ran, failed = [], []
+    try:
+        for q, _ in search.run_subqueries(todo, search_fn, workers=3):
+            manifest.mark_done(q)
+            ran.append(q)
+    except search.SubQueryError as e:
+        failed = [q.start[:7] for q, _ in e.failed]
+    assert failed == sorted(fail)
+    return ran
+
+
+def test_failed_middle_month_is_retried_after_later_months_were_written(tmp_path):
+    path = str(tmp_path / "_search_manifest.json")
+    plan = search.plan_subqueries(BBOX, "2021-06-01", "2021-08-31", tile_deg=20.0)
+    assert [q.start for q in plan] == ["2021-06-01", "2021-07-01", "2021-08-01"]
+
+    manifest = search.SearchManifest(path)
+    _run(search.resume_plan(plan, manifest, latest=None), manifest, fail={"2021-07"})
+    assert len(manifest.done) == 2
+
+    # second run: the catalog's newest scene is in August, but July is still searched in full
+    manifest = search.SearchManifest(path)
+    todo = search.resume_plan(plan, manifest, latest="2021-08-30T22:10:00")
+    assert [(q.start, q.end) for q in todo] == [("2021-07-01", "2021-07-31")]
+    _run(todo, manifest)
+    assert search.resume_plan(plan, search.SearchManifest(path), latest="2021-08-30T22:10:00") == []
+
+
+def test_open_recent_month_restarts_from_newest_scene(tmp_path):
+    path = str(tmp_path / "_search_manifest.json")
+    first = date.today().replace(day=1)
+    plan = search.plan_subqueries(BBOX, first.isoformat(), date.today().isoformat(), tile_deg=20.0)
+    manifest = search.SearchManifest(path)
+    _run(search.resume_plan(plan, manifest), manifest)
+    assert not manifest.done and plan[0].key in manifest.searched
+
+    latest = date.today() - timedelta(days=1)
+    todo = search.resume_plan(plan, search.SearchManifest(path), latest=latest.isoformat(), lookback_days=2)
+    expected = max(latest - timedelta(days=2), first)
+    assert [q.start for q in todo] == [expected.isoformat()]
+    assert todo[0].key == plan[0].key
+
+
+def test_adopt_trusts_a_catalog_written_before_the_manifest(tmp_path):
+    plan = search.plan_subqueries(BBOX, "2021-06-01", "2021-08-31", tile_deg=20.0)
+    manifest = search.SearchManifest(str(tmp_path / "_search_manifest.json"))
+    manifest.adopt(plan, "2021-07-15")
+    todo = search.resume_plan(plan, manifest, latest="2021-07-17T00:00:00", lookback_days=2)
+    assert [(q.start, q.end) for q in todo] == [("2021-07-13", "2021-07-31"), ("2021-08-01", "2021-08-31")]
@@ -0,0 +1,43 @@
+import threading
+import time
+
+import pandas as pd
+
+import pair_schedule
+
+PAIRS = pd.DataFrame({"master_fileID": ["A", "B"], "slave_fileID": ["B", "C"]})
+
+
+def _follow(path, **kwargs):
+    return [row["master_fileID"] for _, row in pair_schedule.follow_ready(str(path), PAIRS, poll=0.01, **kwargs)]
+
+
+def test_follower_stops_at_the_done_event_of_the_run_it_reads(tmp_path):
+    path = tmp_path / pair_schedule.READY_NAME
+    queue = pair_schedule.PairReadyQueue(str(path), PAIRS, {"A", "B"})
+    queue.close()
+    assert _follow(path, idle_timeout=1.0) == ["A"]
+
+
+def test_rerun_replaces_the_queue_and_a_stale_done_is_ignored(tmp_path):
+    path = tmp_path / pair_schedule.READY_NAME
+    old = pair_schedule.PairReadyQueue(str(path), PAIRS, {"A", "B"})
+    old.close()
+    since = time.time() + 0.001
+    time.sleep(0.01)
+
+    def rerun():
+        time.sleep(0.1)
+        new = pair_schedule.PairReadyQueue(str(path), PAIRS, {"A", "B"})
+        new.completed(["C"])
+        new.close()
+
+    writer = threading.Thread(target=rerun)
+    writer.start()
+    # the earlier run's pair is still yielded, but its "done" does not end the follow
+    assert _follow(path, idle_timeout=5.0, since=since) == ["A", "B"]
+    writer.join()
+
+
+def test_follower_gives_up_after_idle_timeout(tmp_path):
+    assert _follow(tmp_path / pair_schedule.READY_NAME, idle_timeout=0.05) == []
@@ -0,0 +1,75 @@
+import os
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+import s1_catalog
+
+
+def _ids(*file_ids):
+    return pa.table({"fileID": pa.array(file_ids, pa.string()), "row": pa.array(range(len(file_ids)), pa.int64())})
+
+
+def test_drop_seen_keeps_first_occurrence_of_every_file_id():
+    batch = _ids("a", "a", "b", "b", "c").to_batches()[0]
+    seen = set()
+    out = s1_catalog.drop_seen(batch, seen)
+    assert out.column("fileID").to_pylist() == ["a", "b", "c"]
+    assert out.column("row").to_pylist() == [0, 2, 4]
+    assert seen == {"a", "b", "c"}
+
+
+def test_drop_seen_skips_known_file_ids():
+    batch = _ids("a", "b", "c").to_batches()[0]
+    assert s1_catalog.drop_seen(batch, {"b"}).column("fileID").to_pylist() == ["a", "c"]
+
+
+def test_dedupe_file_ids_keeps_one_row_per_file_id_in_table_order():
+    out = s1_catalog.dedupe_file_ids(_ids("a", "a", "b", "b", "c"))
+    assert out.column("fileID").to_pylist() == ["a", "b", "c"]
+    assert out.column("row").to_pylist() == [1, 3, 4]   # last occurrence wins
+
+
+def _part(path, file_ids, track=1, direction="ASCENDING"):
+    schema = s1_catalog.file_schema()
+    cols = {f.name: pa.nulls(len(file_ids), f.type) for f in schema}
+    cols["fileID"] = pa.array(file_ids, pa.string())
+    cols["startTime"] = pa.array([f"2021-06-0{i + 1}T00:00:00" for i in range(len(file_ids))], pa.string())
+    cols["track"] = pa.array([track] * len(file_ids), schema.field("track").type)
+    cols["orbitDirection"] = pa.array([direction] * len(file_ids), pa.string())
+    pq.write_table(pa.table(cols, schema=schema), path)
+
+
+def test_compact_partition_swaps_in_place_without_losing_rows(tmp_path):
+    part_dir = tmp_path / "year=2021" / "month=06"
+    part_dir.mkdir(parents=True)
+    _part(part_dir / "part-a-0.parquet", ["a", "b"])
+    _part(part_dir / "part-b-0.parquet", ["b", "c"])
+    (part_dir / f".{s1_catalog.COMPACT_NAME}.tmp").write_bytes(b"left by a crashed run")
+
+    summary = s1_catalog.compact_partition(str(part_dir))
+    assert summary == {"files": 2, "rows_in": 4, "rows_out": 3}
+    assert sorted(os.listdir(part_dir)) == [s1_catalog.COMPACT_NAME]
+    ids = ds.dataset(str(tmp_path), format="parquet", partitioning="hive").to_table(columns=["fileID"])
+    assert sorted(ids.column("fileID").to_pylist()) == ["a", "b", "c"]
+
+    # compacting again replaces the compacted file with itself
+    assert s1_catalog.compact_partition(str(part_dir))["rows_out"] == 3
+    assert sorted(os.listdir(part_dir)) == [s1_catalog.COMPACT_NAME]
+
+
+def test_readers_see_one_row_per_file_id_while_a_partition_holds_duplicates(tmp_path):
+    catalog = tmp_path / "catalog"
+    part_dir = catalog / "year=2021" / "month=06"
+    part_dir.mkdir(parents=True)
+    # the moment between renaming the compacted file in and removing the old part files
+    _part(part_dir / "part-a-0.parquet", ["a", "b"])
+    _part(part_dir / s1_catalog.COMPACT_NAME, ["a", "b"])
+
+    table = s1_catalog.query_catalog(str(catalog), columns=["startTime"])
+    assert table.column_names == ["startTime"] and table.num_rows == 2
+
+    track_dir = tmp_path / "by_track"
+    assert s1_catalog.write_track_layout(str(catalog), str(track_dir)) == 1
+    assert s1_catalog.read_track(str(track_dir), "ASCENDING", 1).column("fileID").to_pylist() == ["a", "b"]
@@ -0,0 +1,49 @@
+import hashlib
+import os
+
+import pandas as pd
+import pytest
+import requests
+
+import slc_download
+
+PAYLOAD = os.urandom(64 * 1024)
+
+
+def _monitor(dest, size):
+    monitor = slc_download.DownloadMonitor(log_path=None)
+    monitor.add_plan(pd.DataFrame({"path": [dest], "bytes": [size]}))
+    monitor.started(dest)
+    return monitor
+
+
+def test_restart_after_ignored_range_is_not_counted_twice(tmp_path, served):
+    dest = str(tmp_path / "S1A_A.zip")
+    with open(dest + slc_download.PART_SUFFIX, "wb") as f:
+        f.write(PAYLOAD[:20_000])
+    monitor = _monitor(dest, len(PAYLOAD))
+    assert monitor.done_bytes == 20_000
+
+    slc_download.download_file(served.add("S1A_A.zip", PAYLOAD), dest, requests.Session(), size=len(PAYLOAD),
+                               md5=hashlib.md5(PAYLOAD).hexdigest(), monitor=monitor)
+    assert open(dest, "rb").read() == PAYLOAD
+    assert monitor.done_bytes == len(PAYLOAD)
+    assert monitor.transferred == len(PAYLOAD)
+
+
+def test_md5_mismatch_discards_the_transferred_bytes(tmp_path, served):
+    dest = str(tmp_path / "S1A_A.zip")
+    monitor = _monitor(dest, len(PAYLOAD))
+    with pytest.raises(slc_download.DownloadError, match="md5 mismatch"):
+        slc_download.download_file(served.add("S1A_A.zip", PAYLOAD), dest, requests.Session(), size=len(PAYLOAD), md5="0" * 32, monitor=monitor)
+    assert not os.path.exists(dest + slc_download.PART_SUFFIX)
+    assert monitor.done_bytes == 0
+
+
+def test_client_error_fails_without_retrying(tmp_path, served):
+    dest = str(tmp_path / "S1A_missing.zip")
+    monitor = _monitor(dest, len(PAYLOAD))
+    with pytest.raises(slc_download.DownloadError, match="404"):
+        slc_download.download_file(f"{served.base}/S1A_missing.zip", dest, requests.Session(),
+                                   size=len(PAYLOAD), backoff=60.0, monitor=monitor)
+    assert monitor.files[dest]["retries"] == 0
@@ -0,0 +1,55 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import requests
+
+import slc_download
+import slc_store
+
+
+def _pairs():
+    return pd.DataFrame({"master_fileID": ["S1A_A-SLC"], "slave_fileID": ["S1A_B-SLC"]})
+
+
+@pytest.mark.parametrize("budget", [None, 1e9])
+def test_scenes_without_catalog_size_download_through_the_store(tmp_path, served, budget):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    store = slc_store.SLCStore(str(raw), _pairs(), budget_bytes=budget)
+    plan = pd.DataFrame({
+        "fileID": ["S1A_A-SLC", "S1A_B-SLC"],
+        "url":    [served.add(f"{name}.zip", os.urandom(4096)) for name in ("S1A_A", "S1A_B")],
+        "path":   [store.path_of["S1A_A-SLC"], store.path_of["S1A_B-SLC"]],
+        "bytes":  [np.nan, None],      # rows catalogued before sizes were captured
+        "md5sum": [None, None],
+    })
+    fid_of = dict(zip(plan["path"], plan["fileID"]))
+    results = slc_download.download_all(
+        plan, requests.Session(), workers=2,
+        on_start=lambda r: store.reserve(r.fileID, r.bytes),
+        on_done=lambda path, err: store.unreserve(fid_of[path]),
+    )
+    assert results == {p: None for p in plan["path"]}
+    assert set(store.resident()) == {"S1A_A-SLC", "S1A_B-SLC"}
+    assert store._reserved == {}
+
+
+def test_reserve_counts_unknown_size_as_zero(tmp_path):
+    store = slc_store.SLCStore(str(tmp_path), _pairs(), budget_bytes=10)
+    store.reserve("S1A_A-SLC", float("nan"))
+    store.reserve("S1A_B-SLC", None)
+    assert store._reserved == {"S1A_A-SLC": 0, "S1A_B-SLC": 0}
+
+
+def test_release_evicts_scenes_no_pending_pair_needs(tmp_path):
+    pairs = pd.DataFrame({"master_fileID": ["S1A_A-SLC", "S1A_A-SLC"], "slave_fileID": ["S1A_B-SLC", "S1A_C-SLC"]})
+    store = slc_store.SLCStore(str(tmp_path), pairs)
+    for path in store.path_of.values():
+        open(path, "wb").write(b"x" * 10)
+    assert store.release("S1A_A-SLC", "S1A_B-SLC") == 10       # B is done, A is still needed
+    assert set(store.resident()) == {"S1A_A-SLC", "S1A_C-SLC"}
+    assert store.release("S1A_A-SLC", "S1A_C-SLC") == 20
+    assert store.resident() == {}
+    assert slc_store.SLCStore(str(tmp_path), pairs).pending_pairs().empty